@@ -0,0 +1,28 @@
+#############
+## Imports ##
+#############
+
+import sys
+import argparse
+import benchmarks
+
+
+############
+## Bench! ##
+############
+
+parser = argparse.ArgumentParser(prog='python benchmarks', description='Benchmark the matplotlib games')
+parser.add_argument('pattern', nargs='?', default='', help='only run benchmarks containing this string')
+parser.add_argument('-o', '--output', default='bench.json', help='json file to save the results to')
+parser.add_argument('-b', '--baseline', default=None, help='json file with results to compare against')
+parser.add_argument('-t', '--threshold', type=float, default=1.25, help='slowdown ratio (of the fastest repetitions) considered a regression')
+args = parser.parse_args()
+
+results = benchmarks.run(args.pattern)
+benchmarks.save(results, args.output)
+
+if args.baseline is not None:
+    print('\ncompared to %s:'%args.baseline)
+    regressions = benchmarks.compare(results, benchmarks.load(args.baseline), args.threshold)
+    if regressions:
+        sys.exit(1)
@@ -0,0 +1,419 @@
+''' Benchmarks for the hot paths of the matplotlib games '''
+
+#############
+## Imports ##
+#############
+
+import io
+import os
+import sys
+import json
+import time
+import platform
+from random import seed as random_seed
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common')) # see common.add_paths
+from common import headless, add_paths, no_draw
+headless()
+add_paths(['terminal'])
+
+import connect4
+import snake
+import arena
+import tetris
+import matplotlib
+import matplotlib.pyplot as plt
+try:
+    import termios
+except ImportError: # the terminal frontend needs termios (not available on Windows)
+    terminal = None
+else:
+    import terminal
+
+
+##############
+## Registry ##
+##############
+
+BENCHMARKS = []
+
+def benchmark(name, number=100, repeat=7):
+    ''' Register a benchmark
+
+    Arguments
+    ---------
+    name : name of the benchmark (used as key in the results)
+    number : number of calls to time per repetition
+    repeat : number of repetitions (each with a fresh setup)
+
+    Note
+    ----
+    The decorated function performs the (untimed) setup and returns
+    the zero-argument callable that will be timed.
+    '''
+    def decorator(func):
+        BENCHMARKS.append((name, number, repeat, func))
+        return func
+    return decorator
+
+
+#############
+## Helpers ##
+#############
+
+def serpentine(length, M):
+    ''' A snake body of the given length folded in rows of width M.
+
+    The head is the first point; it sits at the end of the top row and the
+    rows above it are free, so the snake can safely move up.
+    '''
+    x, y = [], []
+    for i in range(length):
+        row, col = divmod(i, M)
+        x.append(col if row%2 == 0 else M-1-col)
+        y.append(row)
+    return x[::-1], y[::-1]
+
+def snake_game(M, N, length):
+    ''' A SnakeGame with a snake of the given length, moving up '''
+    game = snake.SnakeGame(M, N)
+    game.snake.x, game.snake.y = serpentine(length, M)
+    game.snake.direction = 'up'
+    game.snake.next_directions = []
+    game.food.x, game.food.y = -1, -1 # out of reach
+    return game
+
+def image_snake_game(M, N, length):
+    ''' A SnakeGame in image mode with a snake of the given length, moving up '''
+    game = cached(('image-snake', M, N), lambda: snake.SnakeGame(M, N, image=True))
+    game.grid[:] = snake.EMPTY
+    game.snake.body.clear()
+    for x, y in zip(*serpentine(length, M)):
+        game.snake.body.append((x, y))
+        game.grid[y, x] = snake.SNAKE
+    game.snake.direction = 'up'
+    game.snake.next_directions = []
+    return game
+
+def connect4_board(X=7, Y=6, moves=30, seed=0):
+    ''' A crowded connect 4 game without a winner '''
+    rng = np.random.RandomState(seed)
+    game = connect4.Game(X, Y, verbose=False)
+    for _ in range(100*moves):
+        if moves == 0:
+            break
+        x = rng.randint(X)
+        if not game.update_array(game.current_player, x):
+            continue
+        if game.state() != 0: # undo winning moves
+            game.array[x, np.sum(game.array[x] > 0)-1] = 0
+            continue
+        game.switch_player()
+        moves -= 1
+    return game
+
+def crowded_board(game, lines=4, seed=0):
+    ''' Fill the bottom of the tetris board: `lines` full lines with a
+    random, half filled, region on top of them '''
+    rng = np.random.RandomState(seed)
+    X, Y = game.board.shape
+    game.board[:] = False
+    game.board[:, Y-2*lines:] = rng.rand(X, 2*lines) > 0.5
+    full = rng.choice(np.arange(Y-2*lines, Y), lines, replace=False)
+    game.board[:, full] = True
+    for i in range(X):
+        for j in range(Y):
+            game.board_plots[i,j].set_color('C0' if game.board[i,j] else 'none')
+
+_cache = {}
+def cached(key, factory):
+    ''' Figures are expensive to create: create them only once '''
+    if key not in _cache:
+        _cache[key] = factory()
+    return _cache[key]
+
+
+##############
+## Connect4 ##
+##############
+
+@benchmark('connect4.Game.state/empty', number=200)
+def bench_connect4_state_empty():
+    game = connect4.Game(verbose=False)
+    return game.state
+
+@benchmark('connect4.Game.state/crowded', number=200)
+def bench_connect4_state_crowded():
+    game = connect4_board()
+    return game.state
+
+@benchmark('connect4.Game.update_array', number=1)
+def bench_connect4_update_array():
+    game = connect4.Game(verbose=False)
+    player = game.current_player
+    def fill():
+        for x in range(game.X):
+            for y in range(game.Y+1): # the last move fails
+                game.update_array(player, x)
+    return fill
+
+
+############
+## Tetris ##
+############
+
+def tetris_game():
+    return cached('tetris', lambda: tetris.Tetris(seed=0))
+
+def tetris_block(cls):
+    def factory():
+        block = cls()
+        block.create()
+        return block
+    return cached(cls.__name__, factory)
+
+@benchmark('tetris.Block.move_down', number=1000)
+def bench_tetris_move_down():
+    game = tetris_game()
+    crowded_board(game, lines=0)
+    block = tetris_block(tetris.IBlock)
+    def move_down():
+        block.y[:] = [-4,-3,-2,-1] # stay at the top of the board
+        with no_draw():
+            block.move_down(game)
+    return move_down
+
+@benchmark('tetris.Block._rotate', number=1000)
+def bench_tetris_rotate():
+    game = tetris_game()
+    crowded_board(game, lines=0)
+    block = tetris_block(tetris.TBlock)
+    block.x, block.y = tetris.TBlock().x, tetris.TBlock().y + 10 # inside the board
+    def rotate():
+        with no_draw():
+            block._rotate(game, 1, 1j)
+    return rotate
+
+@benchmark('tetris.Tetris.remove_lines/crowded', number=1, repeat=20)
+def bench_tetris_remove_lines():
+    game = tetris_game()
+    crowded_board(game, lines=4)
+    def remove_lines():
+        with no_draw():
+            game.remove_lines()
+    return remove_lines
+
+
+###########
+## Snake ##
+###########
+
+def snake_move(M, N, length):
+    game = cached(('snake', M, N), lambda: snake_game(M, N, 10))
+    game.snake.x, game.snake.y = serpentine(length, M)
+    game.snake.direction = 'up'
+    game.snake.next_directions = []
+    game.food.x, game.food.y = -1, -1 # out of reach
+    def move():
+        with no_draw():
+            game.snake.move()
+    return move
+
+@benchmark('snake.Snake.move/10', number=200)
+def bench_snake_move_10():
+    return snake_move(30, 20, 10)
+
+@benchmark('snake.Snake.move/1k', number=200)
+def bench_snake_move_1k():
+    return snake_move(100, 300, 1000)
+
+@benchmark('snake.Snake.move/100k', number=20, repeat=3)
+def bench_snake_move_100k():
+    return snake_move(1000, 1000, 100000)
+
+@benchmark('snake.Food.new_location/nearly-full', number=20)
+def bench_snake_new_location():
+    M, N = 30, 20
+    game = cached(('snake', M, N), lambda: snake_game(M, N, 10))
+    game.snake.x, game.snake.y = serpentine(M*N-10, M)
+    random_seed(0)
+    return game.food.new_location
+
+def image_snake_move(M, N, length):
+    game = image_snake_game(M, N, length)
+    def move():
+        with no_draw():
+            game.snake.move()
+    return move
+
+@benchmark('snake.ImageSnake.move/10', number=500)
+def bench_image_snake_move_10():
+    return image_snake_move(1000, 1000, 10)
+
+@benchmark('snake.ImageSnake.move/100k', number=500)
+def bench_image_snake_move_100k():
+    return image_snake_move(1000, 1000, 100000)
+
+@benchmark('snake.Arena.tick/500', number=100)
+def bench_arena_tick():
+    game = arena.Arena(snakes=500, seed=0)
+    return game.tick
+
+
+############
+## Render ##
+############
+
+@benchmark('render/connect4', number=20)
+def bench_render_connect4():
+    game = cached('connect4', lambda: connect4.MplGame())
+    game.array[:] = connect4_board().array
+    game.verbose = False
+    plt.figure(game.fig.number) # visualize draws the current figure
+    return game.visualize
+
+@benchmark('render/tetris', number=20)
+def bench_render_tetris():
+    game = tetris_game()
+    crowded_board(game, lines=0)
+    return game.canvas.fig.canvas.draw
+
+@benchmark('render/snake', number=20)
+def bench_render_snake():
+    game = cached(('snake', 30, 20), lambda: snake_game(30, 20, 10))
+    game.snake.x, game.snake.y = serpentine(100, 30)
+    game.snake.plot.set_data(game.snake.x, game.snake.y)
+    return game.fig.canvas.draw
+
+@benchmark('render/snake-image/1000x1000', number=20)
+def bench_render_image_snake():
+    game = image_snake_game(1000, 1000, 100000)
+    game.image.stale = True
+    return game.fig.canvas.draw
+
+@benchmark('render/snake-arena/500', number=20)
+def bench_render_arena():
+    game = cached('arena', lambda: arena.MplArena(snakes=500, fps=60, seed=0))
+    return game.update
+
+def terminal_frame(game):
+    ''' One update of a terminal game, drawn on a screen that writes to memory '''
+    screen = terminal.Screen(*game.codes().shape, out=io.StringIO())
+    screen.draw(game.codes())
+    def frame():
+        game.update()
+        screen.out.seek(0) # keep the buffer small
+        screen.draw(game.codes())
+    return frame
+
+if terminal is not None:
+    @benchmark('render/terminal/tetris', number=50)
+    def bench_render_terminal_tetris():
+        return terminal_frame(terminal.Tetris(seed=0))
+
+    @benchmark('render/terminal/snake', number=200)
+    def bench_render_terminal_snake():
+        random_seed(0)
+        return terminal_frame(terminal.Snake(30, 20))
+
+
+##########
+## Runs ##
+##########
+
+def run(pattern='', verbose=True):
+    ''' Run the benchmarks
+
+    Arguments
+    ---------
+    pattern : only run the benchmarks whose name contains this string
+    verbose : print the results
+
+    Returns
+    -------
+    results : dictionary containing the timings (in seconds per call)
+    '''
+    selected = [(name, number, repeat, func) for name, number, repeat, func in BENCHMARKS if pattern in name]
+    # the repetitions are run in rounds over all benchmarks: a slow spell of the
+    # machine then does not slow down all repetitions of the same benchmark
+    times = dict((name, []) for name, number, repeat, func in selected)
+    for i in range(max([repeat for name, number, repeat, func in selected] + [0])):
+        for name, number, repeat, func in selected:
+            if i < repeat:
+                stmt = func()
+                t = time.perf_counter()
+                for _ in range(number):
+                    stmt()
+                times[name].append((time.perf_counter() - t)/number)
+
+    results = {}
+    for name, number, repeat, func in selected:
+        results[name] = {
+            'min':min(times[name]),
+            'median':float(np.median(times[name])),
+            'mean':float(np.mean(times[name])),
+            'number':number,
+            'repeat':repeat,
+        }
+        if verbose:
+            print('%-40s %12.1f us'%(name, 1e6*results[name]['min']))
+    _cache.clear()
+    plt.close('all')
+    return results
+
+def metadata():
+    ''' Information about the machine and the library versions '''
+    return {
+        'python':platform.python_version(),
+        'platform':platform.platform(),
+        'numpy':np.__version__,
+        'matplotlib':matplotlib.__version__,
+        'backend':matplotlib.get_backend(),
+        'time':time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+def save(results, filename):
+    ''' Save the results (with metadata) to a json file '''
+    with open(filename, 'w') as file:
+        json.dump({'metadata':metadata(), 'results':results}, file, indent=2, sort_keys=True)
+
+def load(filename):
+    ''' Load the results from a json file '''
+    with open(filename, 'r') as file:
+        return json.load(file)['results']
+
+def compare(results, baseline, threshold=1.25, verbose=True):
+    ''' Compare results with a baseline
+
+    Arguments
+    ---------
+    results : results of the current run
+    baseline : results of a previous run
+    threshold : time ratio above which a benchmark is a regression
+
+    Note
+    ----
+    The fastest repetitions are compared: the noise of a busy machine only
+    makes a repetition slower, and moves the median by far more than 10%.
+
+    Returns
+    -------
+    regressions : names of the benchmarks that became slower
+    '''
+    regressions = []
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        ratio = results[name]['min']/baseline[name]['min']
+        flag = ''
+        if ratio > threshold:
+            flag = 'REGRESSION'
+            regressions.append(name)
+        elif ratio < 1.0/threshold:
+            flag = 'improvement'
+        if verbose:
+            print('%-40s %8.2fx %s'%(name, ratio, flag))
+    return regressions
+
@@ -0,0 +1,119 @@
+''' Helpers shared by the tools that run the games (benchmarks, recorder, wall, ...) '''
+
+#############
+## Imports ##
+#############
+
+import os
+import sys
+import numpy as np
+
+##############
+## Settings ##
+##############
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GAMES = ['connect4', 'snake', 'tetris']
+
+# every board is converted to color codes, which index the palette
+COLORS = ['white', 'lightgray', 'dimgray'] + ['C%i'%i for i in range(10)] + ['red', 'green']
+HEX = { # the matplotlib colors, without importing matplotlib
+    'white':'#ffffff', 'lightgray':'#d3d3d3', 'dimgray':'#696969', 'red':'#ff0000', 'green':'#008000',
+    'C0':'#1f77b4', 'C1':'#ff7f0e', 'C2':'#2ca02c', 'C3':'#d62728', 'C4':'#9467bd',
+    'C5':'#8c564b', 'C6':'#e377c2', 'C7':'#7f7f7f', 'C8':'#bcbd22', 'C9':'#17becf',
+}
+PALETTE = np.array([[int(HEX[color][i:i+2], 16) for i in (1, 3, 5)] for color in COLORS], dtype=np.uint8)
+CODES = dict((color, code) for code, color in enumerate(COLORS))
+CODES.update({'r':CODES['red'], 'g':CODES['green']}) # as used by the snake plots
+EMPTY, GAP, FIXED = CODES['white'], CODES['lightgray'], CODES['dimgray']
+
+
+###########
+## Paths ##
+###########
+
+def add_paths(folders=GAMES):
+    ''' The games and the tools are not packages: put their folders on the path to make
+    their modules importable. Only the folder of this module is put on the path by the
+    modules that use it (with a single sys.path.insert, marked "see common.add_paths"). '''
+    for folder in folders:
+        path = os.path.join(ROOT, folder)
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+def headless():
+    ''' Make the game modules importable, drawing on the Agg backend (without a window) '''
+    import matplotlib
+    matplotlib.use('Agg')
+    add_paths()
+
+def use_tk():
+    ''' The games are meant to be played in a Tk window: use the TkAgg backend if possible '''
+    import matplotlib.pyplot as plt
+    try:
+        plt.switch_backend('TkAgg')
+    except ImportError:
+        pass # headless: keep the default backend
+
+
+############
+## Boards ##
+############
+
+def tetris_codes(game):
+    ''' Color codes of a tetris board (the fixed blocks are gray) '''
+    codes = np.where(game.board[:, 1:].T, FIXED, EMPTY).astype(np.uint8) # row 0 is not shown
+    block = game.block
+    visible = block.y > 0
+    codes[block.y[visible]-1, block.x[visible]] = CODES[block.color]
+    return codes
+
+def snake_codes(game):
+    ''' Color codes of a snake grid (with the origin in the bottom left) '''
+    if hasattr(game, 'grid'): # image mode: the game keeps an occupancy grid
+        return np.array([EMPTY, CODES['red'], CODES['green']], dtype=np.uint8)[game.grid[::-1]]
+    codes = np.full((game.N, game.M), EMPTY, dtype=np.uint8)
+    codes[game.N-1-np.array(game.snake.y), np.array(game.snake.x)] = CODES['red']
+    if 0 <= game.food.x < game.M and 0 <= game.food.y < game.N:
+        codes[game.N-1-game.food.y, game.food.x] = CODES['green']
+    return codes
+
+def connect4_codes(game):
+    ''' Color codes of a connect 4 board (with the origin in the bottom left) '''
+    colors = [EMPTY] + [CODES[player.color] for player in game.players]
+    return np.array(colors, dtype=np.uint8)[game.array.T[::-1]]
+
+def board_codes(game):
+    ''' Color codes of the board of any of the games '''
+    if hasattr(game, 'board'):
+        return tetris_codes(game)
+    if hasattr(game, 'snake'):
+        return snake_codes(game)
+    if hasattr(game, 'array'):
+        return connect4_codes(game)
+    raise TypeError('unknown game %r'%game)
+
+
+#############
+## Drawing ##
+#############
+
+class no_draw(object):
+    ''' Context manager that turns plt.draw into a no-op
+
+    The games call plt.draw after every change, which renders the figure
+    synchronously on the Agg backend. Within this context, the caller
+    decides when the figure is drawn (or times the logic without it).
+    '''
+    def __enter__(self):
+        import matplotlib.pyplot as plt
+        self.plt, self.draw = plt, plt.draw
+        plt.draw = lambda: None
+    def __exit__(self, *args):
+        self.plt.draw = self.draw
+
+
+class Key(object):
+    ''' A minimal stand-in for a matplotlib key press event '''
+    def __init__(self, key):
+        self.key = key
@@ -3,6 +3,7 @@
 ## Imports ##
 #############
 
+import sys
 from connect4 import Ai
 from connect4 import Person
 from connect4 import MplGame
@@ -12,8 +13,12 @@ from connect4 import MplGame
 ## Play! ##
 ###########
 
-
-player1 = Person(1, name='Tom')
-player2 = Ai(2, name='David')
-game = MplGame(players=(player1, player2))
-game.play()
+if __name__ == '__main__': # the server's worker processes should not run this script
+    if len(sys.argv) > 1: # python connect4 server / python connect4 loadtest
+        import server
+        server.main(sys.argv[1:])
+    else:
+        player1 = Person(1, name='Tom')
+        player2 = Ai(2, name='David')
+        game = MplGame(players=(player1, player2))
+        game.play()
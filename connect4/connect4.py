@@ -3,16 +3,22 @@
 #############
 
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.signal import convolve2d
 
 ##############
 ## Settings ##
 ##############
-plt.rcParams['toolbar'] = 'None'
-plt.rcParams['keymap.xscale'] = 'None'
-plt.rcParams['keymap.yscale'] = 'None'
-plt.rcParams['axes.grid']=True
+plt = None # matplotlib.pyplot: only imported when a game is drawn
+
+def import_pyplot():
+    ''' Import matplotlib.pyplot (the Game and the players do not need it) '''
+    global plt
+    if plt is None:
+        import matplotlib.pyplot as pyplot
+        pyplot.rcParams['toolbar'] = 'None'
+        pyplot.rcParams['keymap.xscale'] = 'None'
+        pyplot.rcParams['keymap.yscale'] = 'None'
+        pyplot.rcParams['axes.grid']=True
+        plt = pyplot
 
 ############
 ## Player ##
@@ -39,6 +45,74 @@ class Ai(Player):
     def play(self, array):
         return int(np.random.rand()*array.shape[0])
 
+class SearchAi(Player):
+    ''' An Ai that searches a few moves ahead (negamax with alpha-beta pruning) '''
+    def __init__(self, idx, name=None, color=None, depth=4):
+        Player.__init__(self, idx, name, color)
+        self.depth = depth
+
+    def play(self, array):
+        X, Y = array.shape
+        board = [[int(v) for v in column] for column in array] # board[x][y]
+        heights = [int(np.sum(column > 0)) for column in array]
+        other = {1:2, 2:1}[self.idx]
+        scores = {}
+        for x in self.order(X):
+            if heights[x] < Y:
+                y = heights[x]
+                board[x][y], heights[x] = self.idx, y+1
+                if self.wins(board, x, y):
+                    scores[x] = 1 + self.depth
+                else:
+                    scores[x] = -self.search(board, heights, other, self.depth-1, -np.inf, np.inf)
+                board[x][y], heights[x] = 0, y
+        if not scores: # the board is full
+            return 0
+        best = max(scores.values())
+        return int(np.random.choice([x for x in scores if scores[x] == best]))
+
+    def order(self, X):
+        ''' Columns in the order they are searched: center columns first '''
+        return sorted(range(X), key=lambda x: abs(2*x - X + 1))
+
+    def search(self, board, heights, player, depth, alpha, beta):
+        ''' The score of the board for the player to move (the faster the win, the higher the score) '''
+        if depth == 0:
+            return 0
+        other = {1:2, 2:1}[player]
+        Y = len(board[0])
+        moved = False
+        for x in self.order(len(board)):
+            if heights[x] >= Y:
+                continue
+            moved = True
+            y = heights[x]
+            board[x][y], heights[x] = player, y+1
+            if self.wins(board, x, y):
+                score = 1 + depth
+            else:
+                score = -self.search(board, heights, other, depth-1, -beta, -alpha)
+            board[x][y], heights[x] = 0, y
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+        return alpha if moved else 0 # a full board is a draw
+
+    def wins(self, board, x, y):
+        ''' Check if the piece at (x, y) connects four '''
+        p = board[x][y]
+        X, Y = len(board), len(board[0])
+        for dx, dy in [(1,0), (0,1), (1,1), (1,-1)]:
+            count = 1
+            for sign in [1, -1]:
+                i, j = x + sign*dx, y + sign*dy
+                while 0 <= i < X and 0 <= j < Y and board[i][j] == p:
+                    count += 1
+                    i, j = i + sign*dx, j + sign*dy
+            if count >= 4:
+                return True
+        return False
+
 
 ##########
 ## Game ##
@@ -111,21 +185,48 @@ class Game(object):
                 row = ' '.join(list(row))
                 print(row)
 
+    def snapshot(self):
+        ''' A compact snapshot of the state of the game: the board size, the turn and a bitboard for every player '''
+        X, Y = self.array.shape
+        return bytes((X, Y, self.turn)) + np.packbits(self.array == 1).tobytes() + np.packbits(self.array == 2).tobytes()
+
+    def restore(self, snapshot):
+        ''' Restore the game to a snapshot made by Game.snapshot (bytes or a row of load_snapshots)
+        of a game with the same board size '''
+        snapshot = np.frombuffer(snapshot, dtype=np.uint8)
+        n = self.array.size
+        if len(snapshot) < 3 or tuple(snapshot[:2]) != self.array.shape or len(snapshot) != 3 + 2*((n+7)//8):
+            raise ValueError('the snapshot was not made on a %ix%i board'%self.array.shape)
+        bits = np.unpackbits(snapshot[3:]).reshape(2, -1)[:, :n] # two bitboards, each padded to whole bytes
+        self.turn = int(snapshot[2])
+        self.array[:] = (bits[0] + 2*bits[1]).reshape(self.array.shape)
+
     def state(self):
         ''' Determines the state of the board. 0: undecided; 1: player 1 won; 2: player2 won. '''
         for p in [1,2]:
-            array = np.array((self.array == p), dtype=int)
-            K = [np.diag(np.ones(4, dtype=int)), # diagonal 1
-                     np.diag(np.ones(4, dtype=int))[::-1], # diagonal 2
-                     np.ones((4,1), dtype=int), # horizontal
-                     np.ones((1,4), dtype=int)] # vertical
-            for k in K:
-                result = convolve2d(array, k, 'valid')
-                if (result == 4).any():
-                    return p
+            a = self.array == p
+            if ((a[:-3] & a[1:-2] & a[2:-1] & a[3:]).any() # horizontal
+                or (a[:, :-3] & a[:, 1:-2] & a[:, 2:-1] & a[:, 3:]).any() # vertical
+                or (a[:-3, :-3] & a[1:-2, 1:-2] & a[2:-1, 2:-1] & a[3:, 3:]).any() # diagonal 1
+                or (a[:-3, 3:] & a[1:-2, 2:-1] & a[2:-1, 1:-2] & a[3:, :-3]).any()): # diagonal 2
+                return p
         return 0
 
 
+###############
+## Snapshots ##
+###############
+
+def save_snapshots(filename, snapshots):
+    ''' Save a list of snapshots (of games with the same size) to a .npy file '''
+    data = np.frombuffer(b''.join(snapshots), dtype=np.uint8)
+    np.save(filename, data.reshape(len(snapshots), -1))
+
+def load_snapshots(filename):
+    ''' Load snapshots from a .npy file (every row is a snapshot that can be restored) '''
+    return np.load(filename)
+
+
 #############
 ## MplGame ##
 #############
@@ -148,11 +249,12 @@ class MplGame(Game):
     Game.__init__(self, X, Y, first, players)
 
     # Matplotlib settings
+    import_pyplot()
     self.bgcolor = bgcolor
     self.fig, self.ax = plt.subplots()
     self.ax.set_facecolor(self.bgcolor)
     self.fig.patch.set_facecolor(self.bgcolor)
-    self.fig.canvas.set_window_title('Connect 4')
+    self.fig.canvas.manager.set_window_title('Connect 4')
     self.timer = self.fig.canvas.new_timer(interval=100)
     self.timer.add_callback(self.visualize)
     self.timer.single_shot = False
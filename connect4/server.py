@@ -0,0 +1,287 @@
+''' An asyncio connect 4 game server '''
+
+#############
+## Imports ##
+#############
+
+import time
+import random
+import asyncio
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from connect4 import Game, Player, Ai, SearchAi
+
+##############
+## Protocol ##
+##############
+
+# Every message is two bytes: a message type and an argument.
+#
+# client -> server:
+#   NEW, opponent : start a new game against the RANDOM or the SEARCH Ai.
+#                   The client is player 1 and makes the first move.
+#   MOVE, column  : play in the given column
+#
+# server -> client (exactly one reply to every client message):
+#   START, idx    : the game has started, the client is player idx
+#   OPPONENT_MOVE, column : the opponent played in the given column, your turn
+#   INVALID, column : the move was not allowed, play again
+#   END, result   : the game is over. The two lowest bits contain the winner
+#                   (0: draw, 1 or 2), the other bits the column+1 of the final
+#                   move of the opponent (0 if the client made the final move).
+
+NEW, MOVE = 0x01, 0x02
+START, OPPONENT_MOVE, INVALID, END = 0x81, 0x82, 0x83, 0x84
+RANDOM, SEARCH = 0, 1
+
+def end_result(winner, column=None):
+    ''' Encode the argument of an END message '''
+    return winner | ((0 if column is None else column + 1) << 2)
+
+def decode_end_result(result):
+    ''' Decode the argument of an END message into (winner, column of the final opponent move or None) '''
+    column = (result >> 2) - 1
+    return result & 3, (None if column < 0 else column)
+
+
+############
+## Server ##
+############
+
+class RemotePlayer(Player):
+    ''' A player that plays over the network '''
+    def __init__(self, idx, reader, name=None, color=None):
+        Player.__init__(self, idx, name, color)
+        self.reader = reader
+    async def play_async(self, array):
+        ''' Wait for the next move of the remote client '''
+        kind, column = await self.reader.readexactly(2)
+        if kind != MOVE:
+            raise ConnectionError('expected a move')
+        return column
+
+
+class Server(object):
+    ''' Hosts many concurrent connect 4 games '''
+    def __init__(self, host='127.0.0.1', port=4444, depth=4, processes=None):
+        ''' Server __init__
+
+        Arguments
+        ---------
+        host : address to listen on
+        port : port to listen on (0: pick a free port)
+        depth : search depth of the SEARCH Ai
+        processes : number of processes searching for the SEARCH Ai moves
+        '''
+        self.host, self.port = host, port
+        self.depth = depth
+        # the workers are spawned (they get our sys.path): forked from this process,
+        # they would inherit (and keep open) the sockets of the clients
+        self.pool = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn'))
+        self.games = 0 # number of games being played
+        self.connections = {} # the writer of every task handling a connected client
+        self.server = None
+
+    async def start(self):
+        ''' Start listening (the port is updated if it was 0) '''
+        self.server = await asyncio.start_server(self.handle, self.host, self.port, backlog=4096)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self.start()
+        print('connect 4 server listening on %s:%i'%(self.host, self.port))
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        ''' Stop listening and close the connections of the remaining clients '''
+        self.server.close()
+        for writer in self.connections.values():
+            writer.close()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+        await self.server.wait_closed()
+        self.pool.shutdown()
+
+    async def handle(self, reader, writer):
+        ''' Play games with a client until it disconnects '''
+        task = asyncio.current_task()
+        self.connections[task] = writer
+        try:
+            while True:
+                kind, opponent = await reader.readexactly(2)
+                if kind != NEW:
+                    break
+                await self.play(reader, writer, opponent)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass # the client left
+        finally:
+            writer.close()
+            self.connections.pop(task, None)
+
+    async def decide(self, player, array):
+        ''' Get the next move of a player, without blocking the event loop '''
+        if isinstance(player, RemotePlayer):
+            return await player.play_async(array)
+        if isinstance(player, SearchAi): # cpu heavy: search in another process
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.pool, player.play, array.copy())
+        return player.play(array)
+
+    async def play(self, reader, writer, opponent):
+        ''' Play one game between the client (player 1) and an Ai (player 2) '''
+        remote = RemotePlayer(1, reader)
+        ai = SearchAi(2, depth=self.depth) if opponent == SEARCH else Ai(2)
+        game = Game(players=(remote, ai), verbose=False)
+        writer.write(bytes((START, remote.idx)))
+        await writer.drain()
+        self.games += 1
+        try:
+            while True:
+                player = game.current_player
+                x = await self.decide(player, game.array)
+                if not (0 <= x < game.X and game.update_array(player, x)):
+                    if player is remote:
+                        writer.write(bytes((INVALID, x)))
+                        await writer.drain()
+                    continue
+                winner = game.state()
+                if winner != 0 or (game.array > 0).all():
+                    writer.write(bytes((END, end_result(winner, None if player is remote else x))))
+                    await writer.drain()
+                    return
+                if player is not remote:
+                    writer.write(bytes((OPPONENT_MOVE, x)))
+                    await writer.drain()
+                game.switch_player()
+        finally:
+            self.games -= 1
+
+
+############
+## Client ##
+############
+
+async def play_games(host, port, games, opponent, latencies, seed=None):
+    ''' A simulated client playing random (legal) moves
+
+    Arguments
+    ---------
+    host : address of the server
+    port : port of the server
+    games : number of games to play
+    opponent : RANDOM or SEARCH
+    latencies : list to which the latency of every move is appended (in seconds)
+    seed : random seed of the client
+    '''
+    rng = random.Random(seed)
+    X, Y = Game().array.shape
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(games):
+            writer.write(bytes((NEW, opponent)))
+            await writer.drain()
+            await reader.readexactly(2) # START
+            heights = [0]*X
+            while True:
+                x = rng.choice([x for x in range(X) if heights[x] < Y])
+                t = time.perf_counter()
+                writer.write(bytes((MOVE, x)))
+                await writer.drain()
+                kind, arg = await reader.readexactly(2)
+                latencies.append(time.perf_counter() - t)
+                if kind == INVALID:
+                    continue
+                heights[x] += 1
+                if kind == OPPONENT_MOVE:
+                    heights[arg] += 1
+                if kind == END:
+                    break
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+###############
+## Load Test ##
+###############
+
+async def load_test(clients=100, games=10, opponent=RANDOM, host=None, port=4444, depth=4, processes=None):
+    ''' Play many concurrent games against a server and report the throughput and latency
+
+    Arguments
+    ---------
+    clients : number of concurrent clients (connections)
+    games : number of games every client plays
+    opponent : RANDOM or SEARCH
+    host : address of the server (None: start a local server)
+    port : port of the server
+    depth : search depth of the local server
+    processes : number of search processes of the local server
+
+    Returns
+    -------
+    stats : dictionary with the number of client moves, client moves per second and the
+        percentiles of the latency between a client move and the reply of the server
+    '''
+    server = None
+    if host is None:
+        server = Server('127.0.0.1', 0, depth=depth, processes=processes)
+        await server.start()
+        host, port = server.host, server.port
+    latencies = []
+    t = time.perf_counter()
+    try:
+        await asyncio.gather(*[play_games(host, port, games, opponent, latencies, seed=i)
+                               for i in range(clients)])
+    finally:
+        if server is not None:
+            await server.stop()
+    elapsed = time.perf_counter() - t
+    latencies = 1e3*np.array(latencies)
+    return {
+        'moves':len(latencies),
+        'moves/s':len(latencies)/elapsed,
+        'p50 [ms]':np.percentile(latencies, 50),
+        'p99 [ms]':np.percentile(latencies, 99),
+    }
+
+
+##########
+## Main ##
+##########
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python connect4', description='connect 4 game server')
+    commands = parser.add_subparsers(dest='command')
+    serve = commands.add_parser('server', help='host connect 4 games')
+    serve.add_argument('-p', '--port', type=int, default=4444, help='port to listen on')
+    serve.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    serve.add_argument('-d', '--depth', type=int, default=4, help='search depth of the search Ai')
+    serve.add_argument('-j', '--processes', type=int, default=None, help='number of search processes')
+    test = commands.add_parser('loadtest', help='play many concurrent games against a server')
+    test.add_argument('-c', '--clients', type=int, default=100, help='number of concurrent clients')
+    test.add_argument('-g', '--games', type=int, default=10, help='number of games per client')
+    test.add_argument('-s', '--search', action='store_true', help='play against the search Ai')
+    test.add_argument('--host', default=None, help='address of the server (by default, a local server is started)')
+    test.add_argument('-p', '--port', type=int, default=4444, help='port of the server')
+    test.add_argument('-d', '--depth', type=int, default=4, help='search depth of the local server')
+    test.add_argument('-j', '--processes', type=int, default=None, help='number of search processes of the local server')
+    args = parser.parse_args(argv)
+
+    if args.command == 'server':
+        server = Server(args.host, args.port, args.depth, args.processes)
+        try:
+            asyncio.run(server.serve_forever())
+        except KeyboardInterrupt:
+            pass
+    if args.command == 'loadtest':
+        opponent = SEARCH if args.search else RANDOM
+        stats = asyncio.run(load_test(args.clients, args.games, opponent, args.host,
+                                      args.port, args.depth, args.processes))
+        for key, value in stats.items():
+            print('%-10s %10.1f'%(key, value))
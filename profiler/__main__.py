@@ -0,0 +1,53 @@
+#############
+## Imports ##
+#############
+
+import os
+import sys
+import argparse
+from profiler import Profiler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common')) # see common.add_paths
+from common import add_paths, use_tk
+
+
+##############
+## Profile! ##
+##############
+
+parser = argparse.ArgumentParser(prog='python profiler', description='Play a game with a profiling overlay')
+parser.add_argument('game', choices=['snake', 'tetris', 'connect4'], help='the game to play')
+parser.add_argument('-o', '--output', default='profile.csv', help='csv file for the histograms (written on exit)')
+parser.add_argument('-s', '--size', type=int, default=1024, help='size of the ring buffers')
+args = parser.parse_args()
+
+add_paths()
+use_tk()
+
+if args.game == 'snake':
+    from snake import SnakeGame
+    game = SnakeGame()
+    profiler = Profiler(game.fig, size=args.size)
+    profiler.instrument_timer(game.timer) # Snake.move
+    game.on_key = profiler.input(game.on_key)
+    profiler.export_on_close(args.output)
+    game.start()
+
+if args.game == 'tetris':
+    from tetris import Tetris
+    game = Tetris()
+    profiler = Profiler(game.canvas.fig, size=args.size)
+    game.update = profiler.callback(game.update, game.canvas.timer)
+    game.on_key = profiler.input(game.on_key)
+    profiler.export_on_close(args.output)
+    game.start()
+
+if args.game == 'connect4':
+    from connect4 import Ai, Person, MplGame
+    game = MplGame(players=(Person(1), Ai(2)))
+    profiler = Profiler(game.fig, size=args.size)
+    profiler.instrument_timer(game.timer) # MplGame.visualize
+    game.play_person = profiler.input(game.play_person)
+    game.play_ai = profiler.callback(game.play_ai)
+    profiler.export_on_close(args.output)
+    game.play()
@@ -0,0 +1,233 @@
+''' Frame-time and callback profiling for the matplotlib games '''
+
+#############
+## Imports ##
+#############
+
+import csv
+import time
+import atexit
+import numpy as np
+
+
+#################
+## Ring Buffer ##
+#################
+
+class RingBuffer(object):
+    ''' A fixed-size buffer holding the most recent measurements '''
+    def __init__(self, size=1024):
+        ''' RingBuffer __init__
+
+        Arguments
+        ---------
+        size : maximum number of measurements kept in the buffer
+        '''
+        self.data = np.zeros(size)
+        self.size = size
+        self.count = 0 # total number of measurements ever appended
+
+    def append(self, value):
+        ''' Add a measurement, overwriting the oldest one if the buffer is full '''
+        self.data[self.count%self.size] = value
+        self.count += 1
+
+    def values(self):
+        ''' The measurements currently in the buffer (oldest first) '''
+        if self.count < self.size:
+            return self.data[:self.count]
+        i = self.count%self.size
+        return np.concatenate((self.data[i:], self.data[:i]))
+
+    def percentile(self, q):
+        ''' The q-th percentile of the measurements in the buffer (nan if empty) '''
+        if self.count == 0:
+            return np.nan
+        return np.percentile(self.values(), q)
+
+
+###############
+## Histogram ##
+###############
+
+class Histogram(object):
+    ''' Counts of all measurements ever appended, per bin '''
+    def __init__(self, edges):
+        ''' Histogram __init__
+
+        Arguments
+        ---------
+        edges : increasing bin edges. The measurements below the first edge and
+            above the last edge are counted in an underflow and an overflow bin.
+        '''
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(len(self.edges)+1, dtype=np.int64)
+
+    def append(self, value):
+        ''' Count a measurement '''
+        self.counts[np.searchsorted(self.edges, value, side='right')] += 1
+
+    def bins(self):
+        ''' (low, high, count) of every bin, starting with the underflow bin (low is -inf)
+        and ending with the overflow bin (high is inf) '''
+        edges = np.concatenate([[-np.inf], self.edges, [np.inf]])
+        return list(zip(edges[:-1], edges[1:], self.counts))
+
+
+##############
+## Profiler ##
+##############
+
+class Profiler(object):
+    ''' Opt-in instrumentation of the timer callbacks, input handlers and
+    draws of a matplotlib game '''
+    metrics = ['logic', 'draw', 'frame', 'jitter', 'latency']
+    def __init__(self, fig, size=1024, hud=True, hud_interval=0.25, bins=None):
+        ''' Profiler __init__
+
+        Arguments
+        ---------
+        fig : the figure the game is drawn in
+        size : size of the ring buffers
+        hud : show the frame statistics on the canvas
+        hud_interval : minimum time (in seconds) between two HUD updates
+        bins : histogram bin edges in milliseconds (log-spaced from 0.01ms to 10s
+            by default). The jitter (negative for early timer calls) is binned
+            with these edges mirrored around zero.
+
+        Note
+        ----
+        All measurements are stored in seconds:
+            logic : time spent in the timer callbacks (excluding draws)
+            draw : time spent drawing the canvas
+            frame : time between the end of two consecutive draws
+            jitter : deviation of the timer interval from the requested one
+            latency : time from an input event to the end of the next draw
+        The ring buffers hold the latest measurements (for the HUD), the
+        histograms count the measurements of the whole session.
+        '''
+        self.fig = fig
+        self.buffers = dict((metric, RingBuffer(size)) for metric in self.metrics)
+        if bins is None:
+            bins = np.logspace(-2, 4, 61)
+        edges = 1e-3*np.asarray(bins, dtype=float)
+        self.counts = dict((metric, Histogram(edges)) for metric in self.metrics)
+        self.counts['jitter'] = Histogram(np.concatenate([-edges[::-1], edges]))
+        self.last_frame = None # end of the previous draw
+        self.last_call = {} # previous call of each timer
+        self.pending_input = None # time of the first input not yet drawn
+        self.drawing = 0.0 # draw time spent during the current callback
+
+        # wrap the canvas draw (draw_idle ends up calling this draw as well)
+        self._draw = fig.canvas.draw
+        fig.canvas.draw = self.draw
+
+        # heads-up display
+        self.hud = None
+        self.hud_interval = hud_interval
+        self.hud_time = 0.0
+        if hud:
+            self.hud = fig.text(0.01, 0.01, '', family='monospace', fontsize=8,
+                                horizontalalignment='left', verticalalignment='bottom',
+                                bbox=dict(facecolor='white', alpha=0.7, edgecolor='none'))
+
+    def record(self, metric, value):
+        ''' Add a measurement (in seconds) to the ring buffer and the histogram of a metric '''
+        self.buffers[metric].append(value)
+        self.counts[metric].append(value)
+
+    def draw(self, *args, **kwargs):
+        ''' Draw the canvas and record the draw time, frame time and input latency '''
+        t0 = time.perf_counter()
+        result = self._draw(*args, **kwargs)
+        t1 = time.perf_counter()
+        self.drawing += t1 - t0
+        self.record('draw', t1 - t0)
+        if self.last_frame is not None:
+            self.record('frame', t1 - self.last_frame)
+        self.last_frame = t1
+        if self.pending_input is not None:
+            self.record('latency', t1 - self.pending_input)
+            self.pending_input = None
+        return result
+
+    def callback(self, func, timer=None):
+        ''' Wrap a timer callback to record its logic time and the timer jitter
+
+        Arguments
+        ---------
+        func : the callback to wrap
+        timer : the timer calling the callback (used for the jitter)
+        '''
+        def wrapped(*args, **kwargs):
+            t0 = time.perf_counter()
+            if timer is not None:
+                if timer in self.last_call:
+                    expected = timer.interval/1000.0
+                    self.record('jitter', t0 - self.last_call[timer] - expected)
+                self.last_call[timer] = t0
+            self.drawing = 0.0
+            result = func(*args, **kwargs)
+            self.record('logic', time.perf_counter() - t0 - self.drawing)
+            self.update_hud()
+            return result
+        return wrapped
+
+    def input(self, func):
+        ''' Wrap a key or mouse handler to record the latency to the next frame '''
+        def wrapped(*args, **kwargs):
+            if self.pending_input is None:
+                self.pending_input = time.perf_counter()
+            return func(*args, **kwargs)
+        return wrapped
+
+    def instrument_timer(self, timer):
+        ''' Wrap all callbacks currently registered to a timer '''
+        timer.callbacks = [(self.callback(func, timer), args, kwargs)
+                           for func, args, kwargs in timer.callbacks]
+
+    def stats(self):
+        ''' Current frame rate and p50/p99 of every metric (in milliseconds) '''
+        frame = self.buffers['frame']
+        stats = {'fps':1.0/np.mean(frame.values()) if frame.count else np.nan}
+        for metric, buffer in self.buffers.items():
+            stats[metric] = (1e3*buffer.percentile(50), 1e3*buffer.percentile(99))
+        return stats
+
+    def update_hud(self):
+        ''' Show the latest statistics on the canvas (at most every hud_interval seconds) '''
+        now = time.perf_counter()
+        if self.hud is None or now - self.hud_time < self.hud_interval:
+            return
+        self.hud_time = now
+        stats = self.stats()
+        self.hud.set_text('%5.1f fps  frame p50 %5.1f p99 %5.1f ms'%((stats['fps'],) + stats['frame']))
+
+    def histograms(self):
+        ''' Histograms of all measurements of the session
+
+        Returns
+        -------
+        rows : list of (metric, low [ms], high [ms], count) tuples. The first and
+            the last bin of every metric count the measurements outside the bin
+            edges (low is -inf and high is inf).
+        '''
+        rows = []
+        for metric in self.metrics:
+            for low, high, count in self.counts[metric].bins():
+                rows.append((metric, 1e3*low, 1e3*high, count))
+        return rows
+
+    def export(self, filename):
+        ''' Export the histograms of all measurements to a csv file '''
+        with open(filename, 'w') as file:
+            writer = csv.writer(file)
+            writer.writerow(['metric', 'low_ms', 'high_ms', 'count'])
+            for metric, low, high, count in self.histograms():
+                writer.writerow([metric, '%.4g'%low, '%.4g'%high, count])
+
+    def export_on_close(self, filename):
+        ''' Export the histograms to a csv file when the figure is closed, and on exit
+        (the figure is not closed on Ctrl-C or without a window) '''
+        self.fig.canvas.mpl_connect('close_event', lambda event: self.export(filename))
+        atexit.register(self.export, filename)
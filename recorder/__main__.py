@@ -0,0 +1,35 @@
+#############
+## Imports ##
+#############
+
+import argparse
+import recorder
+
+
+#############
+## Record! ##
+#############
+
+def read_keys(filename):
+    ''' Read a key file: every line contains a tick and the key pressed during that tick
+    (as named by matplotlib, use "space" for the space bar) '''
+    keys = {}
+    with open(filename, 'r') as file:
+        for line in file:
+            if line.strip() and not line.startswith('#'):
+                tick, key = line.split()
+                keys.setdefault(int(tick), []).append(' ' if key == 'space' else key)
+    return keys
+
+if __name__ == '__main__': # the worker processes should not run this script
+    parser = argparse.ArgumentParser(prog='python recorder', description='Record a headless game session')
+    parser.add_argument('game', choices=['snake', 'tetris', 'connect4'], help='the game to record')
+    parser.add_argument('output', help='output file: .gif for the built-in writer, any other format is encoded by ffmpeg')
+    parser.add_argument('-t', '--ticks', type=int, default=1000, help='number of timer ticks (frames) to record')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='random seed of the session')
+    parser.add_argument('-k', '--keys', default=None, help='file with a "tick key" pair on every line')
+    parser.add_argument('-j', '--processes', type=int, default=None, help='number of worker processes')
+    args = parser.parse_args()
+
+    keys = None if args.keys is None else read_keys(args.keys)
+    recorder.record(args.output, args.game, args.ticks, args.seed, keys, args.processes)
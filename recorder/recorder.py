@@ -0,0 +1,290 @@
+''' Headless video and GIF recording of the matplotlib games '''
+
+#############
+## Imports ##
+#############
+
+import os
+import sys
+import shutil
+import random
+import tempfile
+import subprocess
+from multiprocessing import Pool
+
+import numpy as np
+from PIL import Image, GifImagePlugin
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common')) # see common.add_paths
+from common import headless, no_draw, Key
+headless()
+
+import connect4
+import snake
+import tetris
+import matplotlib.pyplot as plt
+from matplotlib.colors import BASE_COLORS, TABLEAU_COLORS, to_rgb
+
+
+##############
+## Encoders ##
+##############
+
+class FFmpegWriter(object):
+    ''' Streams RGBA frames to an ffmpeg subprocess '''
+    def __init__(self, filename, width, height, fps):
+        ''' FFmpegWriter __init__
+
+        Arguments
+        ---------
+        filename : the video file to write (the format follows from the extension)
+        width : width of the frames in pixels
+        height : height of the frames in pixels
+        fps : frames per second
+        '''
+        self.filename = filename
+        command = ['ffmpeg', '-y', '-loglevel', 'error',
+                   '-f', 'rawvideo', '-pix_fmt', 'rgba', '-s', '%dx%d'%(width, height),
+                   '-r', '%g'%fps, '-i', '-',
+                   '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', # yuv420p needs even sizes
+                   '-pix_fmt', 'yuv420p', filename]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        ''' Write a (height, width, 4) uint8 RGBA frame (the buffer is passed without copying) '''
+        self.process.stdin.write(frame)
+
+    def close(self):
+        ''' Finish the video '''
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise RuntimeError('ffmpeg failed to write %s'%self.filename)
+
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        self.close()
+
+    @staticmethod
+    def concatenate(filenames, output):
+        ''' Concatenate videos with the same encoding without re-encoding them '''
+        listname = output + '.txt'
+        with open(listname, 'w') as file:
+            for filename in filenames:
+                file.write("file '%s'\n"%os.path.abspath(filename))
+        command = ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                   '-i', listname, '-c', 'copy', output]
+        try:
+            subprocess.check_call(command)
+        finally:
+            os.remove(listname)
+
+
+def gif_palette():
+    ''' A fixed palette: the matplotlib colors completed with a 6x6x6 color cube '''
+    colors = list(BASE_COLORS.values()) + list(TABLEAU_COLORS.values()) + ['#ececec']
+    palette = [int(255*c + 0.5) for color in colors for c in to_rgb(color)]
+    cube = np.linspace(0, 255, 6).astype(int)
+    palette += [int(c) for r in cube for g in cube for b in cube for c in (r, g, b)]
+    palette += [0]*(768 - len(palette))
+    image = Image.new('P', (1, 1))
+    image.putpalette(palette)
+    return image
+
+class GifWriter(object):
+    ''' Streams RGBA frames to an animated GIF (with a fixed palette) '''
+    palette = gif_palette()
+    def __init__(self, filename, width, height, fps):
+        ''' GifWriter __init__
+
+        Arguments
+        ---------
+        filename : the GIF file to write
+        width : width of the frames in pixels
+        height : height of the frames in pixels
+        fps : frames per second
+        '''
+        self.filename = filename
+        self.duration = int(round(1000.0/fps)) # [ms]
+        self.file = open(filename, 'wb')
+        self.first = True
+
+    def write(self, frame):
+        ''' Write a (height, width, 4) uint8 RGBA frame '''
+        image = Image.fromarray(np.asarray(frame), 'RGBA').convert('RGB').quantize(palette=self.palette, dither=Image.Dither.NONE)
+        if self.first:
+            self.file.write(self.header(image))
+            self.first = False
+        for data in GifImagePlugin.getdata(image, duration=self.duration):
+            self.file.write(data)
+
+    def close(self):
+        ''' Finish the GIF '''
+        self.file.write(b';') # trailer
+        self.file.close()
+
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        self.close()
+
+    @classmethod
+    def header(cls, image):
+        ''' The GIF header (including the global palette) for a quantized image '''
+        header, _ = GifImagePlugin.getheader(image, None, {'loop':0, 'optimize':False})
+        return b''.join(header)
+
+    @classmethod
+    def concatenate(cls, filenames, output):
+        ''' Concatenate GIFs written by a GifWriter with the same frame size '''
+        size = Image.open(filenames[0]).size
+        header_size = len(cls.header(Image.new('RGB', size).quantize(palette=cls.palette)))
+        with open(output, 'wb') as out:
+            for i, filename in enumerate(filenames):
+                with open(filename, 'rb') as file:
+                    data = file.read()
+                out.write(data[:-1] if i == 0 else data[header_size:-1]) # strip trailers
+            out.write(b';')
+
+def writer_class(filename):
+    ''' The writer for a filename: a GifWriter for .gif files, an FFmpegWriter otherwise '''
+    return GifWriter if filename.lower().endswith('.gif') else FFmpegWriter
+
+
+##############
+## Sessions ##
+##############
+
+class Session(object):
+    ''' A headless game session, driven by simulated timer ticks '''
+    def __init__(self, game='snake', seed=0, keys=None):
+        ''' Session __init__
+
+        Arguments
+        ---------
+        game : 'snake', 'tetris' or 'connect4' (played by two Ai players)
+        seed : random seed, sessions with the same seed and keys are identical
+        keys : dictionary mapping a tick to the list of keys pressed during that tick
+
+        Note
+        ----
+        One frame is recorded per tick of the game timer, as if the game
+        was played in real time.
+        '''
+        self.name = game
+        self.keys = {} if keys is None else keys
+        random.seed(seed) # snake food
+        np.random.seed(seed) # connect4 Ai
+
+        if game == 'snake':
+            self.game = snake.SnakeGame()
+            self.fig, self.timer = self.game.fig, self.game.timer
+        elif game == 'tetris':
+            self.game = tetris.Tetris(seed=seed)
+            self.fig, self.timer = self.game.canvas.fig, self.game.canvas.timer
+            self.timer.add_callback(self.game.update)
+        elif game == 'connect4':
+            self.game = connect4.MplGame(players=(connect4.Ai(1), connect4.Ai(2)))
+            self.fig, self.timer = self.game.fig, self.game.timer
+            self.game.cid = None
+            for player in self.game.players:
+                player.timer = self.fig.canvas.new_timer()
+            self.timer.callbacks.insert(0, (self.game.play_ai, (), {})) # play before visualize
+        else:
+            raise ValueError('unknown game %r'%game)
+
+        self.fps = 1000.0/self.timer.interval
+        self.width, self.height = self.fig.canvas.get_width_height()
+
+    def over(self):
+        ''' Whether the game has ended '''
+        if self.name == 'connect4':
+            return self.game.state() != 0
+        return self.game.over
+
+    def tick(self, i):
+        ''' Perform the i-th tick of the game timer '''
+        if self.over():
+            return
+        with no_draw():
+            for key in self.keys.get(i, []):
+                if self.name != 'connect4': # connect4 only has Ai players
+                    self.game.on_key(Key(key))
+            for func, args, kwargs in list(self.timer.callbacks):
+                func(*args, **kwargs)
+
+    def frame(self):
+        ''' Render the current frame and return the RGBA buffer of the canvas (not a copy) '''
+        self.fig.canvas.draw()
+        return self.fig.canvas.buffer_rgba()
+
+    def record(self, writer, start, stop):
+        ''' Record the ticks in [start, stop) (the earlier ticks are played without rendering) '''
+        for i in range(start):
+            self.tick(i)
+        for i in range(start, stop):
+            self.tick(i)
+            writer.write(self.frame())
+
+    def close(self):
+        plt.close(self.fig)
+
+
+###############
+## Recording ##
+###############
+
+def record_segment(filename, game, seed, keys, start, stop):
+    ''' Record the ticks in [start, stop) of a session to a file '''
+    session = Session(game, seed, keys)
+    with writer_class(filename)(filename, session.width, session.height, session.fps) as writer:
+        session.record(writer, start, stop)
+    session.close()
+    return filename
+
+def _record_segment(args):
+    return record_segment(*args)
+
+def record(filename, game='snake', ticks=1000, seed=0, keys=None, processes=None, segments=None):
+    ''' Record a headless game session
+
+    Arguments
+    ---------
+    filename : output file (.gif for the built-in GIF writer, any other
+        extension is encoded by ffmpeg)
+    game : 'snake', 'tetris' or 'connect4'
+    ticks : number of timer ticks (= frames) to record
+    seed : random seed of the session
+    keys : dictionary mapping a tick to the list of keys pressed during that tick
+    processes : number of worker processes (defaults to the number of cpus)
+    segments : number of independent segments (defaults to the number of processes)
+
+    Note
+    ----
+    Each segment is rendered by a worker that first replays the session
+    logic (without rendering) up to the start of its segment. The segments
+    are concatenated afterwards. Memory usage does not depend on the
+    number of ticks.
+    '''
+    processes = os.cpu_count() if processes is None else processes
+    segments = processes if segments is None else segments
+    segments = max(1, min(segments, ticks))
+    if segments == 1:
+        return record_segment(filename, game, seed, keys, 0, ticks)
+
+    bounds = np.linspace(0, ticks, segments+1).astype(int)
+    directory = tempfile.mkdtemp()
+    extension = os.path.splitext(filename)[1]
+    try:
+        jobs = [(os.path.join(directory, '%05i%s'%(i, extension)), game, seed, keys, start, stop)
+                for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:]))]
+        pool = Pool(processes)
+        try:
+            filenames = pool.map(_record_segment, jobs)
+        finally:
+            pool.close()
+            pool.join()
+        writer_class(filename).concatenate(filenames, filename)
+    finally:
+        shutil.rmtree(directory)
+    return filename
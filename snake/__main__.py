@@ -2,17 +2,38 @@
 ## Imports ##
 #############
 
+import os
 import sys
 from snake import SnakeGame
+from arena import MplArena
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common')) # see common.add_paths
+from common import use_tk
+
+##############
+## Settings ##
+##############
+
+use_tk()
 
 
 ###########
 ## Play! ##
 ###########
 
+if len(sys.argv) > 1 and sys.argv[1] == 'arena':
+    snakes = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    arena = MplArena(snakes=snakes, player=True)
+    arena.start()
+    sys.exit()
+
 speed = 15
 if len(sys.argv) > 1:
     speed = float(sys.argv[1])
 
-snake_game = SnakeGame(speed=speed)
+M, N = 30, 20
+if len(sys.argv) > 3:
+    M, N = int(sys.argv[2]), int(sys.argv[3])
+
+# markers become unreadable (and slow) on large grids: draw the grid as an image
+snake_game = SnakeGame(M, N, speed=speed, image=M*N > 100*100)
 snake_game.start()
@@ -0,0 +1,325 @@
+''' Snake Arena: many snakes sharing one grid
+
+The arena does not use the Snake, Food and SnakeGame classes of snake.py:
+moving hundreds of those one by one (every snake with its own lists and
+plot) takes far too long for a single tick. The snakes are rows of shared
+arrays instead, moved together, and a Controller steers a group of them.
+'''
+
+#############
+## Imports ##
+#############
+
+import numpy as np
+from snake import DIRECTIONS, DX, DY
+
+##############
+## Settings ##
+##############
+
+plt = None # matplotlib.pyplot: only imported when an arena is drawn
+
+def import_pyplot():
+    ''' Import matplotlib.pyplot (the Arena and the controllers do not need it) '''
+    global plt
+    if plt is None:
+        import matplotlib.pyplot as pyplot
+        pyplot.rcParams['toolbar'] = 'none'
+        plt = pyplot
+
+EMPTY, FOOD = 0, -1 # grid values; snake i occupies the cells with value i+1
+
+
+#################
+## Controllers ##
+#################
+
+class Controller(object):
+    ''' A Controller steers a group of snakes '''
+    def play(self, arena, ids):
+        ''' Return the next direction (index in DIRECTIONS) for each of the snakes with the given ids '''
+        return arena.direction[ids]
+
+class RandomController(Controller):
+    ''' Turns left or right at random '''
+    def __init__(self, turn_probability=0.1, seed=None):
+        self.turn_probability = turn_probability
+        self.random = np.random.RandomState(seed)
+    def play(self, arena, ids):
+        turns = self.random.choice([1, 3], len(ids)) # left or right
+        turns *= self.random.rand(len(ids)) < self.turn_probability
+        return (arena.direction[ids] + turns)%4
+
+class GreedyController(Controller):
+    ''' Heads for the nearest food, without running into an occupied cell '''
+    def play(self, arena, ids):
+        if len(arena.food) == 0: # no room for food: keep going
+            return arena.direction[ids]
+        M, N = arena.M, arena.N
+        y, x = np.divmod(arena.heads(ids).astype(np.int32), M)
+        food_y, food_x = np.divmod(arena.food.astype(np.int32), M)
+
+        # the nearest food for every snake (torus distance)
+        dx = np.abs(x[:, None] - food_x)
+        dy = np.abs(y[:, None] - food_y)
+        nearest = (np.minimum(dx, M-dx) + np.minimum(dy, N-dy)).argmin(axis=1)
+        food_x, food_y = food_x[nearest, None], food_y[nearest, None]
+
+        # straight on, turn left or turn right: whatever gets closest to the food
+        d = arena.direction[ids]
+        candidates = np.stack([d, (d+1)%4, (d+3)%4], axis=1)
+        cx = (x[:, None] + DX[candidates])%M
+        cy = (y[:, None] + DY[candidates])%N
+        dx, dy = np.abs(cx - food_x), np.abs(cy - food_y)
+        distance = np.minimum(dx, M-dx) + np.minimum(dy, N-dy)
+        distance[arena.grid[cy, cx] > 0] = M + N # avoid the snakes
+        return candidates[np.arange(len(ids)), distance.argmin(axis=1)]
+
+class KeyboardController(Controller):
+    ''' Steers with the arrow keys '''
+    def __init__(self):
+        self.next_directions = []
+    def change_direction(self, direction):
+        ''' Store new directions in a list '''
+        if len(self.next_directions) <= 2:
+            self.next_directions += [DIRECTIONS.index(direction)]
+    def play(self, arena, ids):
+        if self.next_directions != []:
+            return np.full(len(ids), self.next_directions.pop(0))
+        return arena.direction[ids]
+
+
+###########
+## Arena ##
+###########
+
+class Arena(object):
+    ''' Many snakes sharing one M x N torus with multiple food items.
+
+    The grid records the owner of every cell, and the bodies of all snakes
+    are stored as rows of a single ring buffer, so that a tick updates all
+    snakes at once with vectorized operations.
+    '''
+    def __init__(self, M=200, N=150, snakes=500, food=200, start_length=5,
+                 controllers=None, respawn=True, seed=None):
+        ''' Arena __init__
+
+        Arguments
+        ---------
+        M : Horizontal number of grid points
+        N : Vertical number of grid points
+        snakes : number of snakes
+        food : number of food items on the grid
+        start_length : the starting length of the snakes
+        controllers : list containing a Controller for every snake (a snake
+            can share its controller with other snakes). By default, all
+            snakes are steered by one GreedyController.
+        respawn : respawn a snake at a random location when it dies
+        seed : random seed for the spawn and food locations
+        '''
+        self.M, self.N = M, N
+        self.S = snakes
+        self.start_length = start_length
+        self.respawn = respawn
+        self.random = np.random.RandomState(seed)
+        self.grid = np.zeros((N, M), dtype=np.int32) # indexed as grid[y, x]
+
+        # snake state (bodies are flat cell indices, in a ring buffer per snake)
+        self.capacity = 4*start_length
+        self.body = np.zeros((snakes, self.capacity), dtype=np.int64)
+        self.head = np.zeros(snakes, dtype=np.int64) # ring buffer position of the head
+        self.length = np.zeros(snakes, dtype=np.int64)
+        self.pending = np.zeros(snakes, dtype=np.int64) # growth still to come
+        self.direction = np.zeros(snakes, dtype=np.int64)
+        self.alive = np.zeros(snakes, dtype=bool)
+        self.deaths = 0
+
+        # group the snakes by controller: every controller is called once per tick
+        if controllers is None:
+            controllers = [GreedyController()]*snakes
+        self.controllers = {}
+        for i, controller in enumerate(controllers):
+            self.controllers.setdefault(controller, []).append(i)
+        self.controllers = [(c, np.array(ids)) for c, ids in self.controllers.items()]
+
+        self.food = np.zeros(0, dtype=np.int64)
+        self.spawn(np.arange(snakes))
+        self.food = self.empty_cells(food)
+        self.grid.ravel()[self.food] = FOOD
+
+    def empty_cells(self, n):
+        ''' Return n distinct random empty cells (fewer if the grid is full) '''
+        flat = self.grid.ravel()
+        cells = np.zeros(0, dtype=np.int64)
+        tries = 0
+        while len(cells) < n:
+            if tries == 16: # the grid is (nearly) full:
+                return self.random.permutation(np.flatnonzero(flat == EMPTY))[:n]
+            candidates = self.random.randint(0, flat.size, 2*(n - len(cells)))
+            candidates = np.unique(np.concatenate([cells, candidates[flat[candidates] == EMPTY]]))
+            cells = self.random.permutation(candidates)
+            tries += 1
+        return cells[:n]
+
+    def spawn(self, ids):
+        ''' (Re)spawn the given snakes with length 1 at random empty cells.
+        They grow to their starting length during their first moves. '''
+        cells = self.empty_cells(len(ids))
+        ids = ids[:len(cells)]
+        self.grid.ravel()[cells] = ids + 1
+        self.head[ids] = 0
+        self.body[ids, 0] = cells
+        self.length[ids] = 1
+        self.pending[ids] = self.start_length - 1
+        self.direction[ids] = self.random.randint(0, 4, len(ids))
+        self.alive[ids] = True
+
+    def heads(self, ids):
+        ''' Flat cell index of the heads of the given snakes '''
+        return self.body[ids, self.head[ids]]
+
+    def cells(self, ids):
+        ''' Flat cell indices of the bodies of the given snakes (concatenated) '''
+        j = np.arange(self.capacity)
+        positions = (self.head[ids, None] - j)%self.capacity
+        return self.body[ids[:, None], positions][j < self.length[ids, None]]
+
+    def grow_capacity(self):
+        ''' Double the size of the ring buffers '''
+        j = np.arange(self.capacity)
+        positions = (self.head[:, None] - j)%self.capacity
+        ordered = self.body[np.arange(self.S)[:, None], positions] # head first
+        self.body = np.zeros((self.S, 2*self.capacity), dtype=np.int64)
+        self.body[:, :self.capacity] = ordered[:, ::-1]
+        self.head[:] = self.capacity - 1
+        self.capacity *= 2
+
+    def kill(self, ids):
+        ''' Remove the given snakes from the grid '''
+        flat = self.grid.ravel()
+        owners = np.repeat(ids, self.length[ids])
+        cells = self.cells(ids)
+        cells = cells[flat[cells] == owners + 1] # a cell can be taken over already
+        flat[cells] = EMPTY
+        self.alive[ids] = False
+        self.length[ids] = 0
+        self.deaths += len(ids)
+
+    def tick(self):
+        ''' Move all snakes one gridpoint '''
+        flat = self.grid.ravel()
+        for controller, ids in self.controllers:
+            ids = ids[self.alive[ids]]
+            if len(ids) > 0:
+                direction = controller.play(self, ids)
+                allowed = direction != (self.direction[ids] + 2)%4 # no U-turns
+                self.direction[ids[allowed]] = direction[allowed]
+
+        ids = np.flatnonzero(self.alive)
+        y, x = np.divmod(self.heads(ids), self.M)
+        d = self.direction[ids]
+        target = ((y + DY[d])%self.N)*self.M + (x + DX[d])%self.M
+
+        # growing snakes keep their tail, the other tails move out
+        ate = flat[target] == FOOD
+        self.pending[ids] += ate
+        grow = self.pending[ids] > 0
+        movers = ids[~grow]
+        flat[self.body[movers, (self.head[movers] - self.length[movers] + 1)%self.capacity]] = EMPTY
+
+        # a snake dies when it runs into a snake or into another head
+        _, inverse, counts = np.unique(target, return_inverse=True, return_counts=True)
+        dead = (flat[target] > 0) | (counts[inverse] > 1)
+        flat[target[ate]] = EMPTY
+
+        # move the heads of the survivors
+        if (self.length[ids] + grow).max(initial=0) > self.capacity:
+            self.grow_capacity()
+        survivors, target, grow = ids[~dead], target[~dead], grow[~dead]
+        self.head[survivors] = (self.head[survivors] + 1)%self.capacity
+        self.body[survivors, self.head[survivors]] = target
+        flat[target] = survivors + 1
+        self.length[survivors] += grow
+        self.pending[survivors] -= grow
+
+        self.kill(ids[dead])
+        if self.respawn:
+            self.spawn(ids[dead])
+
+        # replace the eaten food
+        eaten = flat[self.food] != FOOD
+        if eaten.any():
+            cells = self.empty_cells(eaten.sum())
+            flat[cells] = FOOD
+            self.food = np.concatenate([self.food[~eaten], cells])
+
+
+###############
+## Mpl Arena ##
+###############
+
+class MplArena(Arena):
+    ''' The snake arena visualized with matplotlib '''
+    def __init__(self, M=200, N=150, snakes=500, food=200, speed=60, fps=20, player=False, **kwargs):
+        ''' MplArena __init__
+
+        Arguments
+        ---------
+        M : Horizontal number of grid points
+        N : Vertical number of grid points
+        snakes : number of snakes
+        food : number of food items on the grid
+        speed : number of ticks per second
+        fps : number of frames drawn per second. Drawing the arena takes much
+            longer than a tick: every frame shows the result of speed/fps ticks
+            (rounded, at least one tick per frame).
+        player : steer the first snake with the arrow keys
+        **kwargs : extra arguments for the Arena
+        '''
+        self.keyboard = KeyboardController()
+        if player:
+            controllers = kwargs.pop('controllers', None) or [GreedyController()]*snakes
+            kwargs['controllers'] = [self.keyboard] + list(controllers[1:])
+        Arena.__init__(self, M, N, snakes, food, **kwargs)
+        self.ticks = max(int(round(float(speed)/fps)), 1) # ticks per frame
+
+        # create matplotlib figure
+        import_pyplot()
+        from matplotlib.colors import ListedColormap
+        self.fig, self.ax = plt.subplots()
+        self.fig.canvas.manager.set_window_title("Snake Arena")
+        self.timer = self.fig.canvas.new_timer(interval=int(1000.0*self.ticks/speed))
+        self.timer.single_shot = False
+        self.timer.add_callback(self.update)
+        colors = plt.cm.hsv(np.linspace(0, 1, snakes, endpoint=False))
+        cmap = ListedColormap(np.concatenate([[[1, 1, 1, 1]], colors])) # empty cells are white
+        cmap.set_under('black') # food
+        self.image = self.ax.imshow(self.grid, origin='lower', cmap=cmap, vmin=-0.5,
+                                    vmax=snakes+0.5, interpolation='nearest')
+        self.grid = np.ma.getdata(self.image.get_array()) # the image buffer: updated in place
+        self.ax.set_xticks([])
+        self.ax.set_yticks([])
+        self.update_title()
+
+    def start(self):
+        ''' Start the game '''
+        self.timer.start()
+        self.fig.canvas.mpl_connect('key_press_event', self.on_key)
+        plt.show()
+
+    def on_key(self, event):
+        ''' a keypress sends you here '''
+        if event.key in DIRECTIONS:
+            self.keyboard.change_direction(event.key)
+
+    def update_title(self):
+        self.ax.set_title("Alive: %i  Deaths: %i  Longest: %i"%(
+            self.alive.sum(), self.deaths, self.length.max()))
+
+    def update(self):
+        ''' Perform the ticks of a frame and show the result '''
+        for _ in range(self.ticks):
+            self.tick()
+        self.image.stale = True
+        self.update_title()
+        plt.draw()
@@ -5,15 +5,28 @@
 #############
 
 from random import random
-import matplotlib.pyplot as plt
+from collections import deque
+import numpy as np
 
 ##############
 ## Settings ##
 ##############
 
-plt.switch_backend('TkAgg')
-plt.rcParams['toolbar'] = 'none'
-plt.rcParams['font.size'] = 14
+plt = None # matplotlib.pyplot: only imported when a game is drawn
+
+def import_pyplot():
+    ''' Import matplotlib.pyplot (the state and rules of the game do not need it) '''
+    global plt
+    if plt is None:
+        import matplotlib.pyplot as pyplot
+        pyplot.rcParams['toolbar'] = 'none'
+        pyplot.rcParams['font.size'] = 14
+        plt = pyplot
+
+# directions and their steps on the grid
+DIRECTIONS = ["right", "up", "left", "down"]
+DX = np.array([1, 0, -1, 0])
+DY = np.array([0, 1, 0, -1])
 
 
 ##########
@@ -22,7 +35,7 @@ plt.rcParams['font.size'] = 14
 
 class SnakeGame(object):
     ''' The snake game '''
-    def __init__(self, M=30, N=20, speed=15):
+    def __init__(self, M=30, N=20, speed=15, image=False, draw=True):
         ''' SnakeGame __init__
 
         Arguments
@@ -30,25 +43,49 @@ class SnakeGame(object):
         M : Horizontal number of grid points
         N : Vertical number of grid points
         speed : speed of the snake
+        image : draw the grid as a single image instead of markers. The
+            frame time is then independent of the length of the snake,
+            which makes large grids (millions of grid points) playable.
+        draw : draw the game with matplotlib. If False, the game only keeps its
+            state (no figure, timer or artists): call snake.move to advance it.
         '''
         # save parameters
         self.M = M
         self.N = N
-
-        # create matplotlib figure
-        self.fig, self.ax = plt.subplots()
-        plt.axis('scaled')
-        plt.xlim(-0.5, M-0.5)
-        plt.ylim(-0.5, N-0.5)
-        plt.grid(False)
-        self.timer = self.fig.canvas.new_timer(interval=int(1000.0/speed))
-        self.timer.single_shot = False
-        self.ax.set_title("Score: 0")
-        self.fig.canvas.set_window_title("Snake")
-        plt.xticks([])
-        plt.yticks([])
-        self.snake = Snake(self, speed=speed)
-        self.food = Food(self)
+        self.draw = draw
+        self.over = False # the snake is dead
+
+        if draw: # create matplotlib figure
+            import_pyplot()
+            self.fig, self.ax = plt.subplots()
+            plt.axis('scaled')
+            plt.xlim(-0.5, M-0.5)
+            plt.ylim(-0.5, N-0.5)
+            plt.grid(False)
+            self.timer = self.fig.canvas.new_timer(interval=int(1000.0/speed))
+            self.timer.single_shot = False
+            self.ax.set_title("Score: 0")
+            self.fig.canvas.manager.set_window_title("Snake")
+            plt.xticks([])
+            plt.yticks([])
+        else:
+            self.fig = self.ax = self.timer = None
+
+        if image:
+            # occupancy grid (0: empty, SNAKE, FOOD), indexed as grid[y, x]
+            if draw:
+                from matplotlib.colors import ListedColormap
+                self.image = self.ax.imshow(np.zeros((N, M), dtype=np.uint8), origin='lower',
+                                            cmap=ListedColormap(['white', 'red', 'green']),
+                                            vmin=0, vmax=2, interpolation='nearest')
+                self.grid = np.ma.getdata(self.image.get_array()) # the image buffer: updated in place
+            else:
+                self.grid = np.zeros((N, M), dtype=np.uint8)
+            self.snake = ImageSnake(self, speed=speed)
+            self.food = ImageFood(self)
+        else:
+            self.snake = Snake(self, speed=speed)
+            self.food = Food(self)
 
     def start(self):
         ''' Start the game '''
@@ -61,6 +98,110 @@ class SnakeGame(object):
         if event.key in ['left', 'right', 'up', 'down']:
             self.snake.change_direction(event.key)
 
+    def snapshot(self):
+        ''' A compact snapshot of the state of the game (see HEADER) '''
+        x, y = np.array(self.snake.x, dtype=np.int64), np.array(self.snake.y, dtype=np.int64)
+        header = np.zeros((), dtype=HEADER)
+        header['M'], header['N'] = self.M, self.N
+        header['start_length'] = self.snake.length
+        header['direction'] = DIRECTIONS.index(self.snake.direction)
+        header['next_directions'] = len(self.snake.next_directions)
+        for i, direction in enumerate(self.snake.next_directions):
+            header['next_directions'] |= DIRECTIONS.index(direction) << 2*(i+1)
+        header['dead'] = self.over
+        header['food_x'], header['food_y'] = self.food.x, self.food.y
+        header['head_x'], header['head_y'] = x[0], y[0]
+        header['size'] = len(x)
+        # the body is stored as the steps from every grid point to the next (2 bits per step)
+        step = np.zeros(len(x)-1, dtype=np.uint8)
+        step[(x[1:] - x[:-1])%self.M == 1] = 0 # right
+        step[(y[1:] - y[:-1])%self.N == 1] = 1 # up
+        step[(x[1:] - x[:-1])%self.M == self.M-1] = 2 # left
+        step[(y[1:] - y[:-1])%self.N == self.N-1] = 3 # down
+        bits = (step[:, None] >> np.array([1, 0], dtype=np.uint8)) & 1
+        return header.tobytes() + np.packbits(bits).tobytes()
+
+    def restore(self, snapshot):
+        ''' Restore the game to a snapshot made by SnakeGame.snapshot
+
+        Arguments
+        ---------
+        snapshot : the snapshot (bytes or an element of load_snapshots) of a game
+            with the same grid size
+        '''
+        snapshot = np.frombuffer(snapshot, dtype=np.uint8)
+        header = snapshot[:HEADER.itemsize].view(HEADER)[0]
+        if (header['M'], header['N']) != (self.M, self.N):
+            raise ValueError('the snapshot was made on a %ix%i grid'%(header['M'], header['N']))
+        size = int(header['size'])
+        bits = np.unpackbits(snapshot[HEADER.itemsize:], count=2*(size-1)).reshape(-1, 2)
+        step = 2*bits[:, 0] + bits[:, 1]
+        x = (header['head_x'] + np.cumsum(np.concatenate([[0], DX[step]])))%self.M
+        y = (header['head_y'] + np.cumsum(np.concatenate([[0], DY[step]])))%self.N
+
+        snake, food = self.snake, self.food
+        snake.length = int(header['start_length'])
+        snake.direction = DIRECTIONS[header['direction']]
+        next_directions = int(header['next_directions'])
+        snake.next_directions = [DIRECTIONS[(next_directions >> 2*(i+1))&3]
+                                 for i in range(next_directions&3)]
+        self.over = bool(header['dead'])
+
+        if hasattr(self, 'grid'): # image mode: redraw the changed grid points only
+            self.grid[snake.y, snake.x] = EMPTY
+            if food.x >= 0:
+                self.grid[food.y, food.x] = EMPTY
+            snake.body = deque(zip(x.tolist(), y.tolist()))
+            self.grid[y, x] = SNAKE
+            food.x, food.y = int(header['food_x']), int(header['food_y'])
+            if food.x >= 0:
+                self.grid[food.y, food.x] = FOOD
+        else:
+            snake.x, snake.y = x.tolist(), y.tolist()
+            food.x, food.y = int(header['food_x']), int(header['food_y'])
+
+        if self.draw:
+            self.timer.single_shot = self.over
+            for text in list(self.ax.texts): # remove the Game Over message
+                text.remove()
+            if hasattr(self, 'image'):
+                self.image.stale = True
+            else:
+                snake.plot.set_data(snake.x, snake.y)
+                food.plot.set_data([food.x], [food.y])
+            self.ax.set_title("Score: "+str(size-snake.length))
+            plt.draw()
+
+
+###############
+## Snapshots ##
+###############
+
+# A snapshot of a snake game is a header of this type, followed by the body
+# of the snake, stored as the step (2 bits) from every grid point to the next.
+HEADER = np.dtype([
+    ('M', '<u4'), ('N', '<u4'), # the size of the grid
+    ('start_length', '<u4'),
+    ('direction', 'u1'), # index in DIRECTIONS
+    ('next_directions', 'u1'), # number of directions (2 bits), followed by the directions (2 bits each)
+    ('dead', 'u1'),
+    ('food_x', '<i4'), ('food_y', '<i4'),
+    ('head_x', '<u4'), ('head_y', '<u4'),
+    ('size', '<u4'), # number of grid points of the snake
+])
+
+def save_snapshots(filename, snapshots):
+    ''' Save a list of snapshots to a .npz file '''
+    sizes = [len(snapshot) for snapshot in snapshots]
+    data = np.frombuffer(b''.join(snapshots), dtype=np.uint8)
+    np.savez(filename, data=data, offsets=np.cumsum([0] + sizes))
+
+def load_snapshots(filename):
+    ''' Load a list of snapshots from a .npz file '''
+    with np.load(filename) as f:
+        data, offsets = f['data'], f['offsets']
+    return [data[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])]
+
 
 ###########
 ## Snake ##
@@ -93,8 +234,9 @@ class Snake(object):
         self.opposites = {"left":"right", "right":"left", "up":"down", "down":"up"}
 
         # relevant matplotlib parameters:
-        self.plot, = plt.plot(self.x, self.y, "rs", markersize=8)
-        self.game.timer.add_callback(self.move)
+        if self.game.draw:
+            self.plot, = plt.plot(self.x, self.y, "rs", markersize=8)
+            self.game.timer.add_callback(self.move)
 
     def change_direction(self, direction):
         ''' Store new directions in a list '''
@@ -135,8 +277,9 @@ class Snake(object):
             self.x = [self.x[0]] + self.x[:-1]
 
         # Visualize the snake in its new location
-        self.plot.set_data(self.x, self.y)
-        plt.draw()
+        if self.game.draw:
+            self.plot.set_data(self.x, self.y)
+            plt.draw()
 
     def eat(self):
         ''' Eat the food and become one point longer. '''
@@ -155,20 +298,24 @@ class Snake(object):
             self.x = [self.x[0]] + self.x
 
         # Visualize the snake in its new location
-        self.plot.set_data(self.x, self.y)
-        self.game.ax.set_title("Score: "+str(len(self.x)-self.length))
-        plt.draw()
+        if self.game.draw:
+            self.plot.set_data(self.x, self.y)
+            self.game.ax.set_title("Score: "+str(len(self.x)-self.length))
+            plt.draw()
 
     def dead(self):
         ''' The snake bites its own tail and is now dead '''
-        print('dead')
-
-        # stop the timer (and give time to display the Game Over message)
-        self.game.timer.single_shot = True
+        self.game.over = True
 
         # delete the head (this is kind of a hack)
         del self.x[0]
         del self.y[0]
+        if not self.game.draw:
+            return
+        print('dead')
+
+        # stop the timer (and give time to display the Game Over message)
+        self.game.timer.single_shot = True
 
         # show a final Game Over message
         message = "DEAD!\nscore: "+str(len(self.x)-self.length+1)
@@ -178,6 +325,120 @@ class Snake(object):
         plt.draw()
 
 
+#################
+## Image Snake ##
+#################
+
+EMPTY, SNAKE, FOOD = 0, 1, 2
+
+class ImageSnake(Snake):
+    ''' A Snake drawn in the occupancy grid image of the game.
+
+    The body is a ring buffer of grid points and collisions are looked up
+    in the occupancy grid: a move only changes the head and the tail,
+    whatever the length of the snake.
+    '''
+    steps = dict(zip(DIRECTIONS, zip(DX.tolist(), DY.tolist()))) # (dx, dy) of every direction
+    def __init__(self, game, speed=15, start_length=10):
+        ''' ImageSnake __init__
+
+        Arguments
+        ---------
+        game : the game the snake is situated in (created with image=True)
+        speed : the speed of the snake
+        start_length : the starting length of the snake
+        '''
+        self.game = game
+        self.speed = speed
+        self.length = start_length
+        self.body = deque((x%self.game.M, self.game.N//2)
+                          for x in range(self.game.M//2+self.length, self.game.M//2, -1))
+        for x, y in self.body:
+            self.game.grid[y, x] = SNAKE
+        self.direction = "right"
+        self.next_directions = ["right"]
+        self.opposites = {"left":"right", "right":"left", "up":"down", "down":"up"}
+        if self.game.draw:
+            self.game.timer.add_callback(self.move)
+
+    @property
+    def x(self):
+        ''' x-coordinates of the body (head first) '''
+        return [x for x, y in self.body]
+
+    @property
+    def y(self):
+        ''' y-coordinates of the body (head first) '''
+        return [y for x, y in self.body]
+
+    def move(self):
+        ''' Move the snake one gridpoint '''
+        # Check if direction was changed:
+        if self.next_directions != []:
+            next_direction = self.next_directions.pop(0)
+            opposite_direction = self.opposites[self.direction]
+            if next_direction != opposite_direction:
+                self.direction = next_direction
+
+        # the next location of the head
+        dx, dy = self.steps[self.direction]
+        x, y = self.body[0]
+        x, y = (x+dx)%self.game.M, (y+dy)%self.game.N
+        grid = self.game.grid
+
+        if grid[y, x] == FOOD:
+            self.eat(x, y)
+            return
+
+        # the tail moves out before the head moves in
+        tail_x, tail_y = self.body.pop()
+        grid[tail_y, tail_x] = EMPTY
+
+        # check if the snake bites its tail
+        if grid[y, x] == SNAKE:
+            self.body.append((tail_x, tail_y))
+            grid[tail_y, tail_x] = SNAKE
+            self.dead()
+            return
+
+        self.body.appendleft((x, y))
+        grid[y, x] = SNAKE
+
+        # Visualize the snake in its new location
+        if self.game.draw:
+            self.game.image.stale = True
+            plt.draw()
+
+    def eat(self, x, y):
+        ''' Eat the food at (x, y) and become one point longer. '''
+        self.body.appendleft((x, y))
+        self.game.grid[y, x] = SNAKE
+        self.game.food.new_location()
+
+        # Visualize the snake in its new location
+        if self.game.draw:
+            self.game.image.stale = True
+            self.game.ax.set_title("Score: "+str(len(self.body)-self.length))
+            plt.draw()
+
+    def dead(self):
+        ''' The snake bites its own tail and is now dead '''
+        self.game.over = True
+        if not self.game.draw:
+            return
+        print('dead')
+
+        # stop the timer (and give time to display the Game Over message)
+        self.game.timer.single_shot = True
+
+        # show a final Game Over message
+        message = "DEAD!\nscore: "+str(len(self.body)-self.length)
+        self.game.ax.annotate(message, xy=(self.game.M/2, self.game.N/2), fontsize=24,
+                              horizontalalignment='center', verticalalignment='center',
+                              bbox=dict(facecolor='red', alpha=0.5))
+        plt.draw()
+
+
 ##########
 ## Food ##
 ##########
@@ -199,7 +460,8 @@ class Food(object):
         self.game = game
 
         # relevant matplotlib parameters:
-        self.plot, = plt.plot(0, 0, "go")
+        if self.game.draw:
+            self.plot, = plt.plot([0], [0], "go")
         self.new_location()
 
     def new_location(self):
@@ -210,4 +472,38 @@ class Food(object):
         forbidden_points = list(zip(self.game.snake.x, self.game.snake.y))
         while (self.x, self.y) in forbidden_points:
             self.new_location()
-        self.plot.set_data(self.x, self.y)
+        if self.game.draw:
+            self.plot.set_data([self.x], [self.y])
+
+
+class ImageFood(Food):
+    ''' Food drawn in the occupancy grid image of the game '''
+    max_tries = 64 # random tries before looking for the free grid points explicitly
+    def __init__(self, game):
+        ''' ImageFood __init__
+
+        Arguments
+        ---------
+        game : the game the food is situated in (created with image=True)
+        '''
+        self.game = game
+        self.new_location()
+
+    def new_location(self):
+        ''' Move the food to a random free grid point '''
+        grid = self.game.grid
+        for _ in range(self.max_tries):
+            x = int(random()*self.game.M)
+            y = int(random()*self.game.N)
+            if grid[y, x] == EMPTY:
+                break
+        else: # the grid is (nearly) full:
+            free = np.flatnonzero(grid.ravel() == EMPTY)
+            if len(free) == 0:
+                self.x, self.y = -1, -1 # no room left for food
+                return
+            y, x = divmod(int(free[int(random()*len(free))]), self.game.M)
+        self.x, self.y = x, y
+        grid[y, x] = FOOD
+        if self.game.draw:
+            self.game.image.stale = True
@@ -0,0 +1,31 @@
+#############
+## Imports ##
+#############
+
+import argparse
+import terminal
+
+
+###########
+## Play! ##
+###########
+
+parser = argparse.ArgumentParser(prog='python terminal', description='Play the games in the terminal')
+parser.add_argument('game', choices=['snake', 'tetris', 'connect4'], help='the game to play')
+parser.add_argument('-s', '--seed', type=int, default=None, help='random seed of the tetris blocks')
+parser.add_argument('--speed', type=float, default=15, help='speed of the snake')
+parser.add_argument('--size', type=int, nargs=2, default=(30, 20), metavar=('M', 'N'), help='size of the snake grid')
+args = parser.parse_args()
+
+if args.game == 'snake':
+    game = terminal.Snake(*args.size, speed=args.speed)
+if args.game == 'tetris':
+    game = terminal.Tetris(seed=args.seed)
+if args.game == 'connect4':
+    game = terminal.Connect4()
+
+try:
+    terminal.play(game)
+except KeyboardInterrupt:
+    pass
+print(game.title())
@@ -0,0 +1,366 @@
+''' Terminal frontend: the games drawn with ANSI escape sequences
+
+The games are created without a figure (they only keep their state and
+rules, and do not import matplotlib), and their boards are drawn in the
+terminal by writing only the cells that changed since the previous frame.
+This starts in a fraction of a second and is cheap enough to play over SSH
+on a machine without a display.
+'''
+
+#############
+## Imports ##
+#############
+
+import os
+import sys
+import time
+import tty
+import select
+import termios
+import codecs
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common')) # see common.add_paths
+from common import add_paths, snake_codes, tetris_codes, connect4_codes, Key, PALETTE, CODES, EMPTY
+add_paths()
+
+from snake import SnakeGame
+from tetris import Tetris as TetrisGame, Canvas
+from connect4 import Game, Person, Ai
+
+##############
+## Settings ##
+##############
+
+def xterm256(rgb):
+    ''' The nearest color of the 6x6x6 color cube of a 256 color terminal '''
+    levels = np.array([0, 95, 135, 175, 215, 255])
+    r, g, b = np.abs(rgb[:, None].astype(int) - levels).argmin(axis=1)
+    return 16 + 36*r + 6*g + b
+
+# a board cell is drawn as two spaces with the color as background (which is roughly square)
+CELLS = ['\x1b[48;5;%im  '%xterm256(rgb) for rgb in PALETTE]
+
+
+############
+## Screen ##
+############
+
+class Screen(object):
+    ''' Draws a board of color codes in the terminal
+
+    The screen keeps the last frame and only writes the cells that changed,
+    every cell with a cursor-addressed escape sequence (which is left out for
+    a cell right of the previous one).
+    '''
+    def __init__(self, height, width, out=None, top=1, left=1):
+        ''' Screen __init__
+
+        Arguments
+        ---------
+        height : number of rows of the board
+        width : number of columns of the board
+        out : the file to write to (default: sys.stdout)
+        top : terminal row of the top of the board (starting at 1)
+        left : terminal column of the left of the board (starting at 1)
+        '''
+        self.out = sys.stdout if out is None else out
+        self.height, self.width = height, width
+        self.top, self.left = top, left
+        self.frame = np.full((height, width), -1, dtype=np.int16) # -1: nothing drawn yet
+        self.texts = {} # the text on every line below the board
+
+    def __enter__(self):
+        ''' Switch to the alternate screen and hide the cursor '''
+        self.out.write('\x1b[?1049h\x1b[?25l\x1b[2J')
+        self.clear()
+        return self
+
+    def __exit__(self, *args):
+        ''' Show the cursor and go back to the normal screen '''
+        self.out.write('\x1b[0m\x1b[?25h\x1b[?1049l')
+        self.out.flush()
+
+    def clear(self):
+        ''' Forget the last frame: everything is redrawn on the next draw '''
+        self.frame[:] = -1
+        self.texts = {}
+
+    def draw(self, codes):
+        ''' Draw the board (an array of color codes) and return the number of changed cells '''
+        rows, columns = np.nonzero(codes != self.frame)
+        if len(rows) == 0:
+            return 0
+        values = codes[rows, columns]
+        # only move the cursor if the cell is not right of the previous one
+        jump = np.ones(len(rows), dtype=bool)
+        jump[1:] = (rows[1:] != rows[:-1]) | (columns[1:] != columns[:-1] + 1)
+        parts = []
+        for row, column, value, moved in zip(rows.tolist(), columns.tolist(), values.tolist(), jump.tolist()):
+            if moved:
+                parts.append('\x1b[%i;%iH'%(self.top + row, self.left + 2*column))
+            parts.append(CELLS[value])
+        parts.append('\x1b[0m')
+        self.out.write(''.join(parts))
+        self.out.flush()
+        self.frame[rows, columns] = values
+        return len(rows)
+
+    def text(self, line, text):
+        ''' Write text on a line below the board (only when it changed) '''
+        if self.texts.get(line) != text:
+            self.texts[line] = text
+            self.out.write('\x1b[%i;%iH\x1b[0m%s\x1b[K'%(self.top + self.height + line, self.left, text))
+            self.out.flush()
+
+
+##############
+## Keyboard ##
+##############
+
+class Keyboard(object):
+    ''' Non-blocking keyboard input
+
+    The keys get the names matplotlib gives them ('left', 'right', 'up',
+    'down', ' ', ...), such that the same key handlers can be used.
+    '''
+    sequences = {'\x1b[A':'up', '\x1b[B':'down', '\x1b[C':'right', '\x1b[D':'left',
+                 '\x1bOA':'up', '\x1bOB':'down', '\x1bOC':'right', '\x1bOD':'left'}
+    def __init__(self, stdin=None):
+        ''' Keyboard __init__
+
+        Arguments
+        ---------
+        stdin : the file to read the keys from (default: sys.stdin)
+        '''
+        self.stdin = sys.stdin if stdin is None else stdin
+        self.fd = self.stdin.fileno()
+        self.attributes = None
+        self.closed = False # no more keys will come
+        self.decoder = codecs.getincrementaldecoder('utf-8')('replace') # a character can be split over two reads
+        self.pending = '' # the start of an escape sequence, of which the rest was not read yet
+
+    def __enter__(self):
+        ''' Read the keys as they are pressed (without waiting for enter or echoing them) '''
+        if os.isatty(self.fd):
+            self.attributes = termios.tcgetattr(self.fd)
+            tty.setcbreak(self.fd)
+        return self
+
+    def __exit__(self, *args):
+        ''' Restore the terminal settings '''
+        if self.attributes is not None:
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, self.attributes)
+
+    def wait(self, timeout):
+        ''' Wait at most timeout seconds for a key press. Returns True if a key was pressed '''
+        if self.closed:
+            time.sleep(max(timeout, 0))
+            return False
+        return bool(select.select([self.fd], [], [], max(timeout, 0))[0])
+
+    def keys(self):
+        ''' The keys pressed since the last call (without blocking)
+
+        An escape sequence can be split over two reads (e.g. over SSH): if the
+        data ends with the start of one, it is kept for the next call. It is
+        returned as separate keys if nothing else was read by then.
+        '''
+        data, self.pending = self.pending, ''
+        read = False
+        while self.wait(0):
+            chunk = os.read(self.fd, 1024)
+            if not chunk: # end of file
+                self.closed = True
+                break
+            data += self.decoder.decode(chunk)
+            read = True
+        keys = []
+        while data:
+            if data[:3] in self.sequences:
+                keys.append(self.sequences[data[:3]])
+                data = data[3:]
+            elif read and not self.closed and data in ['\x1b', '\x1b[', '\x1bO']:
+                self.pending = data
+                break
+            else:
+                keys.append(data[0])
+                data = data[1:]
+        return keys
+
+
+###########
+## Snake ##
+###########
+
+class Snake(object):
+    ''' Plays a SnakeGame (without a figure) in the terminal '''
+    def __init__(self, M=30, N=20, speed=15):
+        ''' Snake __init__
+
+        Arguments
+        ---------
+        M : Horizontal number of grid points
+        N : Vertical number of grid points
+        speed : speed of the snake
+        '''
+        self.game = SnakeGame(M, N, speed=speed, image=True, draw=False)
+        self.interval = 1.0/speed
+
+    @property
+    def over(self):
+        return self.game.over
+
+    def on_key(self, key):
+        if key in ['left', 'right', 'up', 'down']:
+            self.game.snake.change_direction(key)
+
+    def update(self):
+        self.game.snake.move()
+
+    def codes(self):
+        return snake_codes(self.game)
+
+    def title(self):
+        score = len(self.game.snake.body) - self.game.snake.length
+        return "DEAD! score: %i"%score if self.over else "Score: %i"%score
+
+
+############
+## Tetris ##
+############
+
+class Tetris(object):
+    ''' Plays a Tetris game (without a figure) in the terminal '''
+    interval = Canvas.interval/1000.0
+    def __init__(self, seed=None):
+        ''' Tetris __init__
+
+        Arguments
+        ---------
+        seed = None: random seed for the block generation
+        '''
+        self.game = TetrisGame(seed=seed, draw=False)
+
+    @property
+    def over(self):
+        return self.game.over
+
+    def on_key(self, key):
+        if not self.over:
+            self.game.on_key(Key(key))
+
+    def update(self):
+        self.game.update()
+
+    def codes(self):
+        return tetris_codes(self.game)
+
+    def title(self):
+        return 'Game Over' if self.over else 'Tetris'
+
+
+###############
+## Connect 4 ##
+###############
+
+class Connect4(object):
+    ''' Plays a connect 4 Game between a person (player 1) and an Ai (player 2) in the terminal '''
+    interval = 0.1 # thinking time of the Ai (in seconds)
+    def __init__(self, X=7, Y=6, first=1):
+        ''' Connect4 __init__
+
+        Arguments
+        ---------
+        X = 7: size in X-dimension
+        Y = 6: size in Y-dimension
+        first = 1: which player is starting
+        '''
+        self.game = Game(X, Y, first, players=(Person(1), Ai(2)), verbose=False)
+        self.column = X//2 # the column the person is pointing at
+        self.winner = 0
+        self.over = False
+
+    def play(self, x):
+        ''' The current player plays in column x. Returns False if the column is full '''
+        game = self.game
+        if not game.update_array(game.current_player, x):
+            return False
+        self.winner = game.state()
+        self.over = self.winner != 0 or (game.array > 0).all()
+        if not self.over:
+            game.switch_player()
+        return True
+
+    def on_key(self, key):
+        ''' Point at a column with the arrow keys and play with space or down '''
+        if self.over or not isinstance(self.game.current_player, Person):
+            return
+        if key == 'left':
+            self.column = max(self.column - 1, 0)
+        if key == 'right':
+            self.column = min(self.column + 1, self.game.X - 1)
+        if key in [' ', 'down', '\n']:
+            self.play(self.column)
+
+    def update(self):
+        ''' The Ai plays when it is its turn '''
+        player = self.game.current_player
+        if not self.over and not isinstance(player, Person):
+            while not self.play(player.play(self.game.array)):
+                pass
+
+    def codes(self):
+        ''' Color codes of the board, with the piece of the person above it '''
+        board = connect4_codes(self.game)
+        codes = np.full((board.shape[0]+1, board.shape[1]), EMPTY, dtype=np.uint8)
+        codes[1:] = board
+        if not self.over and isinstance(self.game.current_player, Person):
+            codes[0, self.column] = CODES[self.game.current_player.color]
+        return codes
+
+    def title(self):
+        if self.over:
+            return '%s WON'%self.game.get_player(self.winner).name if self.winner else 'Draw'
+        return "%s's turn"%self.game.current_player.name
+
+
+##########
+## Play ##
+##########
+
+def play(game, screen=None, keyboard=None):
+    ''' Play a game in the terminal (press q to quit)
+
+    Arguments
+    ---------
+    game : a Snake, Tetris or Connect4 game
+    screen : the screen to draw on (default: a Screen of the size of the game)
+    keyboard : the keyboard to read from (default: a Keyboard reading stdin)
+
+    Returns
+    -------
+    frames : the number of frames drawn
+    '''
+    screen = Screen(*game.codes().shape) if screen is None else screen
+    keyboard = Keyboard() if keyboard is None else keyboard
+    frames = 0
+    with screen, keyboard:
+        next_update = time.perf_counter() + game.interval
+        while True:
+            # a frame is drawn after every key press and every update
+            screen.draw(game.codes())
+            screen.text(1, game.title())
+            screen.text(2, 'arrows: play, q: quit')
+            frames += 1
+            keyboard.wait(next_update - time.perf_counter())
+            keys = keyboard.keys()
+            if 'q' in keys:
+                return frames
+            for key in keys:
+                game.on_key(key)
+            if time.perf_counter() >= next_update:
+                next_update += game.interval
+                if not game.over:
+                    game.update()
@@ -2,7 +2,17 @@
 ## Imports ##
 #############
 
+import os
+import sys
 from tetris import Tetris
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common')) # see common.add_paths
+from common import use_tk
+
+##############
+## Settings ##
+##############
+
+use_tk()
 
 
 ###########
@@ -3,15 +3,21 @@
 #############
 
 import numpy as np
-import matplotlib.pyplot as plt
 
 ##############
 ## Settings ##
 ##############
 
-plt.switch_backend('TkAgg')
-plt.rcParams['toolbar'] = 'none'
-plt.rcParams['font.size'] = 14
+plt = None # matplotlib.pyplot: only imported when a game is drawn
+
+def import_pyplot():
+    ''' Import matplotlib.pyplot (the state and rules of the game do not need it) '''
+    global plt
+    if plt is None:
+        import matplotlib.pyplot as pyplot
+        pyplot.rcParams['toolbar'] = 'none'
+        pyplot.rcParams['font.size'] = 14
+        plt = pyplot
 
 
 ############
@@ -20,6 +26,8 @@ plt.rcParams['font.size'] = 14
 
 class Canvas(object):
     ''' The Canvas holds the plot data of the Tetris Game '''
+    X, Y = (10, 21) # Hardcoded for now
+    interval = 100 # time between two updates [ms]
     def __init__(self, height=5):
         ''' Canvas __init__
 
@@ -27,13 +35,11 @@ class Canvas(object):
         ---------
         Height of the tetris figure window (in inches).
         '''
-        ## Constants
-        self.X, self.Y = (10, 21) # Hardcoded for now
-
         ## Canvas
+        import_pyplot()
         f = float(height)/self.Y
         self.fig, self.ax = plt.subplots(figsize=(f*self.X, f*(self.Y-1)))
-        self.fig.canvas.set_window_title('Tetris')
+        self.fig.canvas.manager.set_window_title('Tetris')
         self.fig.subplots_adjust(left=0,right=1,bottom=0,top=1)
         self.ax.set_title('test')
         try: # this only works on windows:
@@ -52,7 +58,7 @@ class Canvas(object):
         plt.grid()
 
         ## Timer
-        self.timer = self.fig.canvas.new_timer(interval=100)
+        self.timer = self.fig.canvas.new_timer(interval=self.interval)
         self.timer.single_shot = False
 
 
@@ -70,16 +76,19 @@ class Block(object):
         self.fixed = False # if the block is fixed in place
         self.waiting_time = 5 # Standard waiting time before fixing a block in place
         self.wait = 0 # How much time is left before the block will be fixed in place
+        self.plot = None # the plot on the canvas (None if the game is not drawn)
 
-    def create(self):
-        ''' Creates the plot on the canvas '''
-        markersize = 5.8*plt.gcf().get_size_inches()[0]
-        self.plot, = plt.plot(self.x, self.y, 's', color=self.color, markersize=markersize)
+    def create(self, ax=None):
+        ''' Creates the plot on the canvas (in the current axes if ax is None) '''
+        ax = plt.gca() if ax is None else ax
+        markersize = 5.8*ax.figure.get_size_inches()[0]
+        self.plot, = ax.plot(self.x, self.y, 's', color=self.color, markersize=markersize)
 
     def update(self):
         ''' Updates the plot on the canvas with the new x and y data '''
-        self.plot.set_data(self.x, self.y)
-        plt.draw()
+        if self.plot is not None:
+            self.plot.set_data(self.x, self.y)
+            plt.draw()
 
     def move_down(self, game, recursive=False):
         ''' Move the block one step down, if possible. If recursive = True, the block will
@@ -88,7 +97,7 @@ class Block(object):
         newy = self.y + 1 # next location
 
         # check if the proposed move will fail
-        failed_move = (newy >= game.canvas.Y).any()
+        failed_move = (newy >= game.Y).any()
         if not failed_move:
             failed_move = failed_move or game.board[self.x[newy>0], newy[newy>0]].any()
 
@@ -116,7 +125,7 @@ class Block(object):
         ''' Move the block one position to the right '''
 
         # check if proposed move will fail:
-        failed_move = (self.x+1>game.canvas.X-1).any()
+        failed_move = (self.x+1>game.X-1).any()
         if not failed_move:
             failed_move = failed_move or game.board[self.x[self.y>0]+1, self.y[self.y>0]].any()
 
@@ -152,7 +161,7 @@ class Block(object):
         y = np.int32(np.imag(xy))
 
         # check if the proposed rotation will fail:
-        failed_rotation = (x>=game.canvas.X).any() or (x<0).any() or (y>=game.canvas.Y).any()
+        failed_rotation = (x>=game.X).any() or (x<0).any() or (y>=game.Y).any()
         if not failed_rotation:
             failed_rotation = failed_rotation or game.board[x[y>0],y[y>0]].any()
 
@@ -237,13 +246,47 @@ class OBlock(Block):
     def _rotate(*args):
         pass # OBlock cannot rotate.
 
-class BlockGenerator(np.random.RandomState):
+class BlockGenerator(np.random.Generator):
     ''' The BlockGenerator generates a block of a random type '''
     blocks = [IBlock,ZBlock,SBlock,TBlock,LBlock,JBlock,OBlock]
+    def __init__(self, seed=None):
+        ''' BlockGenerator __init__
+
+        Arguments
+        ---------
+        seed = None: random seed for the block generation
+
+        Note
+        ----
+        The PCG64 bit generator is used because its state is small (37 bytes
+        when packed), which keeps the game snapshots small.
+        '''
+        np.random.Generator.__init__(self, np.random.PCG64(seed))
     def next(self):
         ''' Generate the next block '''
-        block = self.choice(self.blocks)()
+        block = self.blocks[self.integers(len(self.blocks))]()
         return block
+    def get_state(self):
+        ''' Get the random state '''
+        return self.bit_generator.state
+    def set_state(self, state):
+        ''' Set the random state '''
+        self.bit_generator.state = state
+    def pack_state(self):
+        ''' The random state packed in (state, inc, has_uint32, uinteger) byte arrays '''
+        state = self.get_state()
+        return (np.frombuffer(state['state']['state'].to_bytes(16, 'little'), dtype=np.uint8),
+                np.frombuffer(state['state']['inc'].to_bytes(16, 'little'), dtype=np.uint8),
+                state['has_uint32'], state['uinteger'])
+    def unpack_state(self, state, inc, has_uint32, uinteger):
+        ''' Set the random state from the packed state (see pack_state) '''
+        self.set_state({
+            'bit_generator':'PCG64',
+            'state':{'state':int.from_bytes(state.tobytes(), 'little'),
+                     'inc':int.from_bytes(inc.tobytes(), 'little')},
+            'has_uint32':int(has_uint32),
+            'uinteger':int(uinteger),
+        })
     def preview(self):
         ''' Have a look at the next block, without altering the random state '''
         state = self.get_state()
@@ -252,36 +295,110 @@ class BlockGenerator(np.random.RandomState):
         return block
 
 
+###############
+## Snapshots ##
+###############
+
+# A snapshot of a Tetris game is a single record of this type (74 bytes):
+STATE = np.dtype([
+    ('board', 'u1', 27), # the 10 x 21 board, bit-packed
+    ('block', 'u1'), # index of the block type in BlockGenerator.blocks
+    ('x', 'i1', 4), # x location of the block
+    ('y', 'i1', 4), # y location of the block
+    ('wait', 'u1'), # waiting time left before the block is fixed in place
+    ('rng_state', 'u1', 16), # PCG64 state of the block generator
+    ('rng_inc', 'u1', 16),
+    ('rng_has_uint32', 'u1'),
+    ('rng_uinteger', '<u4'),
+])
+
+def save_snapshots(filename, snapshots):
+    ''' Save a list of snapshots to a .npy file '''
+    data = np.frombuffer(b''.join(snapshots), dtype=np.uint8)
+    np.save(filename, data.reshape(len(snapshots), STATE.itemsize))
+
+def load_snapshots(filename):
+    ''' Load snapshots from a .npy file (every row is a snapshot that can be restored) '''
+    return np.load(filename)
+
+
 #################
 ## Tetris Game ##
 #################
 
 class Tetris(object):
     ''' The classic Tetris Game '''
-    def __init__(self, seed=None):
+    def __init__(self, seed=None, draw=True):
         ''' Tetris __init__
 
         Arguments
         ---------
         seed = None: random seed for the block generation
+        draw = True: draw the game with matplotlib. If False, the game only keeps
+            its state (no canvas or artists): call update to advance it.
         '''
+        self.draw = draw
+        self.over = False
+        self.X, self.Y = Canvas.X, Canvas.Y
+
         # canvas
-        self.canvas = Canvas()
+        self.canvas = Canvas() if draw else None
 
         # Block Generator
         self.block_generator = BlockGenerator(seed=seed)
 
         # Create Board:
-        self.board = np.zeros((self.canvas.X, self.canvas.Y), dtype=bool)
-        self.board_plots = np.zeros(self.board.shape, dtype=object)
-        markersize = 5.8*plt.gcf().get_size_inches()[0]
-        for i in range(self.canvas.X):
-            for j in range(self.canvas.Y):
-                self.board_plots[i,j] = plt.plot(i,j,'s', color='none', markersize=markersize)[0]
+        self.board = np.zeros((self.X, self.Y), dtype=bool)
+        if draw:
+            self.board_plots = np.zeros(self.board.shape, dtype=object)
+            markersize = 5.8*plt.gcf().get_size_inches()[0]
+            for i in range(self.X):
+                for j in range(self.Y):
+                    self.board_plots[i,j] = plt.plot([i],[j],'s', color='none', markersize=markersize)[0]
 
         # Create block
         self.block = self.block_generator.next()
-        self.block.create()
+        if draw:
+            self.block.create(self.canvas.ax)
+
+    def snapshot(self):
+        ''' A compact snapshot of the state of the game (board, block and random state) '''
+        state = np.zeros((), dtype=STATE)
+        state['board'] = np.packbits(self.board)
+        state['block'] = BlockGenerator.blocks.index(type(self.block))
+        state['x'], state['y'] = self.block.x, self.block.y
+        state['wait'] = self.block.wait
+        (state['rng_state'], state['rng_inc'],
+         state['rng_has_uint32'], state['rng_uinteger']) = self.block_generator.pack_state()
+        return state.tobytes()
+
+    def restore(self, snapshot):
+        ''' Restore the game to a snapshot
+
+        Arguments
+        ---------
+        snapshot : a snapshot made by Tetris.snapshot (bytes or a row of load_snapshots)
+
+        Note
+        ----
+        The colors of the fixed blocks are not part of the snapshot: on the
+        canvas, they are all drawn in the same color.
+        '''
+        state = np.frombuffer(snapshot, dtype=STATE)[0]
+        self.board[:] = np.unpackbits(state['board'], count=self.board.size).reshape(self.board.shape)
+        block = BlockGenerator.blocks[state['block']]()
+        block.x, block.y = state['x'].astype(int), state['y'].astype(int)
+        block.wait = int(state['wait'])
+        block.plot, self.block = self.block.plot, block # reuse the plot of the current block
+        self.block_generator.unpack_state(state['rng_state'], state['rng_inc'],
+                                          state['rng_has_uint32'], state['rng_uinteger'])
+        self.over = bool((self.board.sum(axis=0)[1:] > 0).all())
+        if self.draw:
+            block.plot.set_data(block.x, block.y)
+            block.plot.set_color(block.color)
+            for (i, j), fixed in np.ndenumerate(self.board):
+                self.board_plots[i,j].set_color('C7' if fixed else 'none')
+            plt.draw()
 
     def start(self):
         ''' Start the Tetris Game '''
@@ -305,6 +422,9 @@ class Tetris(object):
 
     def game_over(self):
         ''' Game Over '''
+        self.over = True
+        if not self.draw:
+            return
         self.canvas.ax.set_title('Game Over')
         self.canvas.timer.single_shot = True
         self.canvas.timer.stop()
@@ -313,14 +433,16 @@ class Tetris(object):
         ''' Update the board '''
         self.block.move_down(self)
         if self.block.fixed:
-            self.block.plot.remove()
-            for x, y in zip(self.block.x, self.block.y):
-                if y > 0:
-                    self.board_plots[x,y].set_color(self.block.color)
+            if self.draw:
+                self.block.plot.remove()
+                for x, y in zip(self.block.x, self.block.y):
+                    if y > 0:
+                        self.board_plots[x,y].set_color(self.block.color)
             self.remove_lines()
             self.block = self.block_generator.next()
-            self.block.create()
-            plt.draw()
+            if self.draw:
+                self.block.create(self.canvas.ax)
+                plt.draw()
             if (self.board.sum(axis=0)[1:] > 0).all():
                 self.game_over()
                 return
@@ -330,17 +452,18 @@ class Tetris(object):
         lines = self.board.prod(axis=0)
         if lines.any():
             line = np.where(lines)[0][0]
-            for i in range(self.canvas.X):
-                self.board_plots[i,line].set_color('none')
-                self.board_plots[i,line].set_ydata(0)
-            for i in range(self.canvas.X):
-                for j in range(line):
-                    self.board_plots[i,j].set_ydata(j+1)
-            self.board_plots = np.concatenate((
-                self.board_plots[:,line:line+1],
-                self.board_plots[:, :line],
-                self.board_plots[:, line+1:]
-            ), axis=-1)
+            if self.draw:
+                for i in range(self.X):
+                    self.board_plots[i,line].set_color('none')
+                    self.board_plots[i,line].set_ydata([0])
+                for i in range(self.X):
+                    for j in range(line):
+                        self.board_plots[i,j].set_ydata([j+1])
+                self.board_plots = np.concatenate((
+                    self.board_plots[:,line:line+1],
+                    self.board_plots[:, :line],
+                    self.board_plots[:, line+1:]
+                ), axis=-1)
             self.board = np.concatenate((
                 np.zeros_like(self.board[:,line:line+1]),
                 self.board[:,:line],
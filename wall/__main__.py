@@ -0,0 +1,72 @@
+#############
+## Imports ##
+#############
+
+import argparse
+from random import random, choice
+from wall import Wall
+from common import add_paths, use_tk
+
+
+############
+## Agents ##
+############
+
+# the games on the wall are played by random agents
+
+def step_tetris(games):
+    for game in games:
+        if game.over: # game over
+            continue
+        if random() < 0.3:
+            choice([game.block.move_left, game.block.move_right, game.block.rotate_anticlockwise])(game)
+        game.update()
+
+def step_snake(games):
+    for game in games:
+        if game.over: # dead
+            continue
+        if random() < 0.1:
+            game.snake.change_direction(choice(['left', 'right', 'up', 'down']))
+        game.snake.move()
+
+def step_connect4(games):
+    for game in games:
+        if game.state() != 0: # start a new game
+            game.array[:] = 0
+            continue
+        if game.update_array(game.current_player, game.current_player.play(game.array)):
+            game.switch_player()
+
+
+############
+## Watch! ##
+############
+
+parser = argparse.ArgumentParser(prog='python wall', description='Watch many games at once')
+parser.add_argument('game', choices=['snake', 'tetris', 'connect4'], help='the game to watch')
+parser.add_argument('boards', nargs='?', type=int, default=64, help='number of boards')
+parser.add_argument('-i', '--interval', type=int, default=100, help='refresh interval in milliseconds')
+args = parser.parse_args()
+
+add_paths()
+use_tk()
+
+games = []
+for i in range(args.boards):
+    if args.game == 'tetris':
+        from tetris import Tetris
+        game = Tetris(draw=False) # only the wall gets a figure
+        step = step_tetris
+    if args.game == 'snake':
+        from snake import SnakeGame
+        game = SnakeGame(draw=False)
+        step = step_snake
+    if args.game == 'connect4':
+        from connect4 import Game
+        game = Game(verbose=False)
+        step = step_connect4
+    games.append(game)
+
+wall = Wall(games, interval=args.interval, step=step)
+wall.start()
@@ -0,0 +1,87 @@
+''' Spectator wall: many live game boards in one figure '''
+
+#############
+## Imports ##
+#############
+
+import os
+import sys
+import numpy as np
+import matplotlib.pyplot as plt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common')) # see common.add_paths
+from common import no_draw, board_codes, PALETTE, GAP
+
+##############
+## Settings ##
+##############
+
+plt.rcParams['toolbar'] = 'none'
+
+
+##########
+## Wall ##
+##########
+
+class Wall(object):
+    ''' Shows many game boards tiled in a single image '''
+    def __init__(self, games, columns=None, gap=1, interval=100, step=None):
+        ''' Wall __init__
+
+        Arguments
+        ---------
+        games : list of Tetris, SnakeGame or connect4 games (all of the same size). The
+            Tetris and SnakeGame games are best created with draw=False: the wall only
+            needs their state, not their figures.
+        columns : number of columns of the wall (by default, the wall is square)
+        gap : gap between the boards (in grid points)
+        interval : refresh interval (in milliseconds)
+        step : function called with the list of games before every refresh
+            (e.g. to advance the games)
+        '''
+        self.games = games
+        self.step = step
+        self.columns = int(np.ceil(np.sqrt(len(games)))) if columns is None else columns
+        self.rows = int(np.ceil(len(games)/float(self.columns)))
+        self.h, self.w = board_codes(games[0]).shape
+        self.codes = np.full((self.rows*self.columns, self.h, self.w), GAP, dtype=np.uint8)
+
+        # create matplotlib figure
+        self.fig, self.ax = plt.subplots()
+        self.fig.canvas.manager.set_window_title('Spectator Wall')
+        self.fig.subplots_adjust(left=0, right=1, bottom=0, top=0.93)
+        shape = (self.rows*(self.h+gap), self.columns*(self.w+gap), 3)
+        self.image = self.ax.imshow(np.full(shape, PALETTE[GAP]), interpolation='nearest')
+        self.ax.set_xticks([])
+        self.ax.set_yticks([])
+        self.ax.set_title('%i boards'%len(games))
+
+        # every board is a (h, w) view in the image buffer
+        buffer = np.ma.getdata(self.image.get_array()) # the image buffer: updated in place
+        self.tiles = buffer.reshape(self.rows, self.h+gap, self.columns, self.w+gap, 3)[:, :self.h, :, :self.w]
+
+        self.timer = self.fig.canvas.new_timer(interval=interval)
+        self.timer.single_shot = False
+        self.timer.add_callback(self.update)
+        self.refresh()
+
+    def start(self):
+        ''' Start refreshing the wall '''
+        self.timer.start()
+        plt.show()
+
+    def refresh(self):
+        ''' Copy the state of all boards into the image '''
+        for i, game in enumerate(self.games):
+            self.codes[i] = board_codes(game)
+        codes = self.codes.reshape(self.rows, self.columns, self.h, self.w)
+        self.tiles[...] = PALETTE[codes.transpose(0, 2, 1, 3)]
+        self.image.stale = True
+
+    def update(self):
+        ''' Advance the games and show the result '''
+        if self.step is not None:
+            with no_draw():
+                self.step(self.games)
+        self.refresh()
+        self.fig.canvas.draw_idle()